@@ -4,11 +4,15 @@ import sys
 # Import functions from your existing modules
 try:
     from src.fox_scraper import run_scraper  # Note: See step 2 below
+    from src.backfill import run_backfill
+    from src.related_index import find_related_articles
+    from src.reanalyzer import run_reanalysis
     from src.keyword_analyzer import analyze_and_print
-    from src.podcast_producer import produce_script
+    from src.podcast_producer import produce_script, produce_scripts_for_range, export_scripts_to_json
     from src.database_manager import (
         init_db,
-        search_articles_advanced,
+        search_articles_page,
+        get_article_detail,
         delete_article,
         get_db_stats,
         export_to_json,
@@ -25,17 +29,68 @@ def display_menu():
     print("1. 🔍 Fetch & Analyze Daily News")
     print("2. 📊 Generate Keyword Analysis Report")
     print("3. 🗄️  Database Operations")
-    print("4. 🎙️  Generate Podcast Script (Coming Soon)")
-    print("5. 🚪 Exit")
+    print("4. 🎙️  Generate Podcast Script")
+    print("5. 🗂️  Backfill Archive from Sitemaps")
+    print("6. 🚪 Exit")
     print("="*40)
 
 
 # main.py
 
+PAGE_SIZE = 10
+
+
+def manage_article(url):
+    """Load one article's details on demand and offer Delete / View actions."""
+    article = get_article_detail(url)
+    if not article:
+        print("❌ Article no longer exists.")
+        return
+
+    summary = article['summary'] or ""
+
+    print("\n" + "="*40)
+    print(f"📄 SELECTED: {article['title']}")
+    print(f"🔗 URL: {url}")
+    print(f"📝 Summary: {summary[:100]}...")
+    print("="*40)
+    
+    action = input("Actions: (D)Delete / (V)View Full / (R)Related / (C)Cancel: ").upper().strip()
+    
+    if action == 'D':
+        confirm = input(f"⚠️ Are you sure you want to delete this article? (y/n): ").lower()
+        if confirm == 'y':
+            if delete_article(url):
+                print("🗑️  Article Deleted Successfully.")
+            else:
+                print("❌ Deletion Failed.")
+                
+    elif action == 'V':
+        print("\n--- Full Summary ---")
+        print(summary)
+        print("\n--- Content ---")
+        print(article['content'] or "(no content)")
+        input("\nPress Enter to continue...")
+
+    elif action == 'R':
+        related = find_related_articles(url)
+        if not related:
+            print("❌ No related articles found.")
+        else:
+            print("\n--- Related Articles ---")
+            for item in related:
+                print(f"{item['score']:.2f} | {item['published_date']:<12} | {item['title'][:50]}")
+        input("\nPress Enter to continue...")
+        
+    else:
+        print("Operation Cancelled.")
+
+
 def manage_articles_ui():
     """
     Interactive UI for Searching, Viewing, and Deleting articles.
-    Flow: Search -> List with IDs -> Select ID -> Action
+    Flow: Search -> Page through results with IDs -> Select ID -> Action
+    Results are fetched one page at a time (keyset pagination); details load only when selected.
     """
     while True:
         print("\n" + "-"*30)
@@ -48,19 +103,17 @@ def manage_articles_ui():
         
         search_choice = input("Select search method (1-4): ").strip()
         
-        results = []
-        
         # --- PHASE 1: SEARCH ---
         if search_choice == '1':
-            date_query = input("Enter Date (YYYY-MM-DD): ").strip()
-            results = search_articles_advanced(date_query, search_type="date")
+            query = input("Enter Date (YYYY-MM-DD): ").strip()
+            search_type = "date"
             
         elif search_choice == '2':
-            keyword = input("Enter Keyword (e.g., AI, Apple): ").strip()
-            results = search_articles_advanced(keyword, search_type="title")
+            query = input("Enter Keyword (e.g., AI, Apple): ").strip()
+            search_type = "title"
             
         elif search_choice == '3':
-            results = search_articles_advanced(query=None) # Get recent
+            query, search_type = None, "title" # Get recent
             
         elif search_choice == '4':
             return # Back to DB menu
@@ -69,61 +122,53 @@ def manage_articles_ui():
             print("❌ Invalid choice.")
             continue
 
-        # --- PHASE 2: LIST & SELECT ---
-        if not results:
-            print("❌ No articles found.")
-            continue
+        # --- PHASE 2: PAGE, LIST & SELECT ---
+        cursors = [None]   # cursors[i] = start of page i+1, so (P)revious just pops
+        while True:
+            results, next_cursor = search_articles_page(query, search_type, cursor=cursors[-1], page_size=PAGE_SIZE)
+
+            if not results:
+                print("❌ No articles found.")
+                break
+
+            print(f"\n✅ Page {len(cursors)}:")
+            print(f"{'ID':<3} | {'Date':<12} | {'Level':<5} | {'Title'}")
+            print("-" * 60)
             
-        print(f"\n✅ Found {len(results)} articles:")
-        print(f"{'ID':<3} | {'Date':<12} | {'Level':<5} | {'Title'}")
-        print("-" * 60)
-        
-        # Enumerate creates a temporary index (1, 2, 3...) for the user
-        for idx, row in enumerate(results, 1):
-            # row = (title, date, level, url, summary)
-            print(f"{idx:<4} | {row[1]:<12} | {row[2]:<5} | {row[0][:40]}...")
-
-        # --- PHASE 3: ACTION ---
-        try:
-            selection = input("\nSelect ID to manage (or Press Enter to cancel): ").strip()
+            # Enumerate creates a temporary index (1, 2, 3...) for the user
+            for idx, row in enumerate(results, 1):
+                # row = (title, date, level, url)
+                print(f"{idx:<4} | {row[1]:<12} | {row[2]:<5} | {row[0][:40]}...")
+
+            nav = []
+            if next_cursor:
+                nav.append("(N)ext")
+            if len(cursors) > 1:
+                nav.append("(P)rev")
+            nav_hint = f", {' / '.join(nav)}" if nav else ""
+
+            # --- PHASE 3: ACTION ---
+            selection = input(f"\nSelect ID to manage{nav_hint} (or Press Enter to go back): ").strip().upper()
             if not selection:
+                break
+
+            if selection == 'N' and next_cursor:
+                cursors.append(next_cursor)
                 continue
-                
-            sel_idx = int(selection) - 1
-            
+            if selection == 'P' and len(cursors) > 1:
+                cursors.pop()
+                continue
+
+            try:
+                sel_idx = int(selection) - 1
+            except ValueError:
+                print("❌ Please enter a valid number.")
+                continue
+
             if 0 <= sel_idx < len(results):
-                target_article = results[sel_idx]
-                # Unpack the tuple
-                title, date, level, url, summary = target_article
-                
-                print("\n" + "="*40)
-                print(f"📄 SELECTED: {title}")
-                print(f"🔗 URL: {url}")
-                print(f"📝 Summary: {summary[:100]}...")
-                print("="*40)
-                
-                action = input("Actions: (D)Delete / (V)View Full / (C)Cancel: ").upper().strip()
-                
-                if action == 'D':
-                    confirm = input(f"⚠️ Are you sure you want to delete this article? (y/n): ").lower()
-                    if confirm == 'y':
-                        if delete_article(url):
-                            print("🗑️  Article Deleted Successfully.")
-                        else:
-                            print("❌ Deletion Failed.")
-                            
-                elif action == 'V':
-                    print("\n--- Full Summary ---")
-                    print(summary)
-                    input("\nPress Enter to continue...")
-                    
-                else:
-                    print("Operation Cancelled.")
+                manage_article(results[sel_idx][3])
             else:
                 print("❌ Invalid ID Number.")
-                
-        except ValueError:
-            print("❌ Please enter a valid number.")
 
 
 def database_ops_menu():
@@ -136,10 +181,11 @@ def database_ops_menu():
         print("2. 📈 View Summary Stats")
         print("3. 📦 Export Data to JSON")
         print("4. 🧹 Clear Keyword Categories")
-        print("5. 🔙 Back to Main Menu")
+        print("5. ♻️  Re-analyze Articles with Current Prompt/Model")
+        print("6. 🔙 Back to Main Menu")
         print("="*40)
         
-        choice = input("Select option (1-5): ").strip()
+        choice = input("Select option (1-6): ").strip()
         
         if choice == '1':
             manage_articles_ui() # Enter the new interactive UI
@@ -148,6 +194,7 @@ def database_ops_menu():
             stats = get_db_stats()
             print(f"\n📂 Database Status:")
             print(f"   • Total Articles: {stats['articles']}")
+            print(f"   • Linked Revisions (near-duplicates): {stats['revisions']}")
             print(f"   • Categorized Keywords: {stats['keywords']}")
             
         elif choice == '3':
@@ -157,19 +204,70 @@ def database_ops_menu():
             confirm = input("⚠️ Clear all AI categories? (y/n): ").lower()
             if confirm == 'y':
                 clear_keyword_categories()
-                
+
         elif choice == '5':
+            confirm = input("⚠️ Re-run AI analysis on every stale article? (y/n): ").lower()
+            if confirm == 'y':
+                run_reanalysis()
+                
+        elif choice == '6':
             break
         else:
             print("Invalid choice.")
 
 
+def read_date(prompt):
+    """Ask for a YYYY-MM-DD date. Returns the string, or None if invalid."""
+    date_input = input(prompt).strip()
+
+    # Use datetime.strptime for strict validation
+    from datetime import datetime
+    try:
+        # This checks both format and logical date validity
+        datetime.strptime(date_input, "%Y-%m-%d")
+        return date_input
+
+    except ValueError:
+        # This catches cases like '2026-13-01' or '2026-02-30' or 'abc'
+        print(f"❌ Invalid date or format: '{date_input}'")
+        print("   Please use the standard YYYY-MM-DD format (e.g., 2026-02-07)")
+        return None
+
+
+def podcast_menu():
+    """Podcast Generator Menu"""
+    print("\n🎧 Podcast Generator")
+    print("1. 📅 Single Date")
+    print("2. 🗓️  Date Range (Batch + Export JSON for TTS)")
+    print("3. 🔙 Back")
+
+    choice = input("Select option (1-3): ").strip()
+
+    if choice == '1':
+        date_input = read_date("Enter the date (YYYY-MM-DD) to generate script: ")
+        if date_input:
+            produce_script(date_input, stream=True)
+
+    elif choice == '2':
+        start_date = read_date("Start date (YYYY-MM-DD): ")
+        end_date = read_date("End date (YYYY-MM-DD): ") if start_date else None
+        if not end_date:
+            return
+        if start_date > end_date:
+            print("❌ Start date must not be after end date.")
+            return
+
+        scripts = produce_scripts_for_range(start_date, end_date)
+        if scripts:
+            export_scripts_to_json(start_date, end_date)
+
+
 def main():
     init_db()
 
     while True:
         display_menu()
-        choice = input("Select an option (1-5): ").strip()
+        choice = input("Select an option (1-6): ").strip()
 
         if choice == '1':
             print("\n📡 Starting Fox News Scraper...")
@@ -183,29 +281,23 @@ def main():
             database_ops_menu()
 
         elif choice == '4':
-            print("\n🎧 Podcast Generator")
-            date_input = input("Enter the date (YYYY-MM-DD) to generate script: ").strip()
-            
-            # Use datetime.strptime for strict validation
-            from datetime import datetime
-            try:
-                # This checks both format and logical date validity
-                valid_date = datetime.strptime(date_input, "%Y-%m-%d")
-                
-                # If valid, proceed to generate script
-                produce_script(date_input)
-                
-            except ValueError:
-                # This catches cases like '2026-13-01' or '2026-02-30' or 'abc'
-                print(f"❌ Invalid date or format: '{date_input}'")
-                print("   Please use the standard YYYY-MM-DD format (e.g., 2026-02-07)")
+            podcast_menu()
             
         elif choice == '5':
+            print("\n🗂️  Historical Backfill")
+            start_date = read_date("Start date (YYYY-MM-DD): ")
+            end_date = read_date("End date (YYYY-MM-DD): ") if start_date else None
+            if end_date and start_date <= end_date:
+                run_backfill(start_date, end_date)
+            elif end_date:
+                print("❌ Start date must not be after end date.")
+
+        elif choice == '6':
             print("\n👋 Goodbye, CYC! Closing dashboard...")
             break
         
         else:
-            print("\n⚠️ Invalid choice. Please enter 1 to 5.")
+            print("\n⚠️ Invalid choice. Please enter 1 to 6.")
 
 
 if __name__ == "__main__":
@@ -1,31 +1,86 @@
 import google.generativeai as genai
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import deque
 from dotenv import load_dotenv
 
+from src import ai_stub
+
 # load environment variables in .env
 load_dotenv()
 
 # os.environ["GEMINI_API_KEY"] = "你的_API_KEY"
 api_key = os.getenv("GOOGLE_API_KEY")
 
-if not api_key:
+# FOX_AI_STUB=1 replaces every Gemini call with deterministic local output (offline load tests, see ai_stub.py)
+AI_STUB = os.getenv("FOX_AI_STUB") == "1"
+
+if not api_key and not AI_STUB:
     raise ValueError("❌ Error: GOOGLE_API_KEY not found!")
 
-genai.configure(api_key=api_key) 
+if api_key:
+    genai.configure(api_key=api_key)
+
+MODEL_NAME = ai_stub.STUB_MODEL_NAME if AI_STUB else "gemini-2.5-flash"
+TECH_PROMPT = "tech_p2.txt"
+
+# Gemini free tier allows ~10 requests per minute on Flash; override with GEMINI_RPM
+AI_REQUESTS_PER_MINUTE = int(os.getenv("GEMINI_RPM", "10"))
+
+_rate_lock = threading.Lock()
+_request_times = deque()
+
+
+def wait_for_rate_limit():
+    """Block until one more Gemini request fits in the per-minute budget (thread-safe)."""
+    while True:
+        with _rate_lock:
+            now = time.monotonic()
+            while _request_times and now - _request_times[0] >= 60:
+                _request_times.popleft()
+
+            if len(_request_times) < AI_REQUESTS_PER_MINUTE:
+                _request_times.append(now)
+                return
+
+            wait_seconds = 60 - (now - _request_times[0])
+        time.sleep(wait_seconds)
+
+
+def get_prompt_version(prompt_name):
+    """
+    Short hash of a prompt template together with the model name.
+    Stored next to AI output so we can tell when it was produced by an older prompt/model.
+    """
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    prompt_path = os.path.join(base_dir, "prompts", prompt_name)
+
+    with open(prompt_path, "rb") as f:
+        digest = hashlib.sha256(f.read() + MODEL_NAME.encode("utf-8"))
+    return digest.hexdigest()[:12]
+
+
+def get_analysis_version():
+    # Version of the article analysis (tech prompt + model); stored per row as analysis_version
+    return get_prompt_version(TECH_PROMPT)
 
 
 def analyze_tech_article(content):
     #  input: aritcle cotent (str)
     # output: analyzed Dict (json)
+    if AI_STUB:
+        return ai_stub.analyze_tech_article(content)
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    model = genai.GenerativeModel(MODEL_NAME)
 
     # 1. Get path of ai_service.py (src/)
     base_dir = os.path.dirname(os.path.abspath(__file__))
 
     # 2. Combine the complete path of prompt.txt
-    prompt_path = os.path.join(base_dir, "prompts", "tech_p2.txt")
+    prompt_path = os.path.join(base_dir, "prompts", TECH_PROMPT)
 
     # ----- Read Prompt -----
     try:
@@ -46,6 +101,7 @@ def analyze_tech_article(content):
 
     # ----- Feed AI -----
     try:
+        wait_for_rate_limit()
         response = model.generate_content(
             final_prompt,
             generation_config={"response_mime_type": "application/json"}
@@ -64,8 +120,10 @@ def categorize_keywords_batch(keywords_list):
     """
     if not keywords_list:
         return {}
+    if AI_STUB:
+        return ai_stub.categorize_keywords_batch(keywords_list)
 
-    model = genai.GenerativeModel("gemini-2.5-flash")
+    model = genai.GenerativeModel(MODEL_NAME)
     base_dir = os.path.dirname(os.path.abspath(__file__))
     prompt_path = os.path.join(base_dir, "prompts", "category_p2.txt")
 
@@ -77,6 +135,7 @@ def categorize_keywords_batch(keywords_list):
         keywords_str = ", ".join(keywords_list)
         final_prompt = prompt_template.replace("{keywords_list}", keywords_str)
 
+        wait_for_rate_limit()
         response = model.generate_content(
             final_prompt,
             generation_config={"response_mime_type": "application/json"}
@@ -88,24 +147,34 @@ def categorize_keywords_batch(keywords_list):
         return {}
     
 
-def generate_podcast_script(article_data):
-    model = genai.GenerativeModel("gemini-2.5-flash")
+def build_podcast_prompt(article_data):
     base_dir = os.path.dirname(os.path.abspath(__file__))
     prompt_path = os.path.join(base_dir, "prompts", "podcast_p1.txt")
 
-    try:
-        with open(prompt_path, "r", encoding="utf-8") as f:
-            prompt_template = f.read()
+    with open(prompt_path, "r", encoding="utf-8") as f:
+        prompt_template = f.read()
 
-        # 填入變數
-        final_prompt = prompt_template.replace("{title}", article_data['title'])
-        final_prompt = final_prompt.replace("{summary}", article_data.get('summary', ''))
-        final_prompt = final_prompt.replace("{tech_level}", str(article_data.get('tech_level', 5)))
-        
-        # [關鍵修改] 填入全文！
-        # 為了安全，我們截取前 15,000 字 (Gemini Flash 其實可以吃更多，但這樣通常夠了)
-        final_prompt = final_prompt.replace("{content}", article_data.get('content', '')[:15000])
+    # 填入變數
+    final_prompt = prompt_template.replace("{title}", article_data['title'])
+    final_prompt = final_prompt.replace("{summary}", article_data.get('summary', ''))
+    final_prompt = final_prompt.replace("{tech_level}", str(article_data.get('tech_level', 5)))
+    
+    # [關鍵修改] 填入全文！
+    # 為了安全，我們截取前 15,000 字 (Gemini Flash 其實可以吃更多，但這樣通常夠了)
+    final_prompt = final_prompt.replace("{content}", article_data.get('content', '')[:15000])
+    return final_prompt
+
+
+def generate_podcast_script(article_data):
+    if AI_STUB:
+        return ai_stub.generate_podcast_script(article_data)
+
+    model = genai.GenerativeModel(MODEL_NAME)
 
+    try:
+        final_prompt = build_podcast_prompt(article_data)
+
+        wait_for_rate_limit()
         response = model.generate_content(
             final_prompt,
             generation_config={"response_mime_type": "application/json"}
@@ -114,4 +183,71 @@ def generate_podcast_script(article_data):
 
     except Exception as e:
         print(f"❌ Podcast Generation Failed: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def iter_json_array_objects(chunks):
+    """
+    Incremental parser for a streamed JSON list of objects, e.g. '[{"speaker": ...}, {...}]'.
+    Yields each top-level object as soon as its closing brace arrives.
+    A malformed object is reported and skipped instead of losing the whole list.
+    """
+    buffer = []
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for chunk in chunks:
+        for ch in chunk:
+            if depth == 0:
+                # Between objects: skip '[', ',', whitespace and ']'
+                if ch == "{":
+                    depth = 1
+                    buffer = [ch]
+                continue
+
+            buffer.append(ch)
+
+            if in_string:
+                if escaped:
+                    escaped = False
+                elif ch == "\\":
+                    escaped = True
+                elif ch == '"':
+                    in_string = False
+                continue
+
+            if ch == '"':
+                in_string = True
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    raw = "".join(buffer)
+                    try:
+                        yield json.loads(raw)
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️ Skipped malformed script line: {e} | {raw[:60]}...")
+
+
+def generate_podcast_script_stream(article_data):
+    """
+    Streaming version of generate_podcast_script.
+    Yields {speaker, emotion, text} dicts one by one while Gemini is still writing the rest.
+    Errors are raised to the caller, so a half-finished script is never mistaken for a full one.
+    """
+    if AI_STUB:
+        yield from ai_stub.generate_podcast_script(article_data)
+        return
+
+    model = genai.GenerativeModel(MODEL_NAME)
+    final_prompt = build_podcast_prompt(article_data)
+
+    wait_for_rate_limit()
+    response = model.generate_content(
+        final_prompt,
+        generation_config={"response_mime_type": "application/json"},
+        stream=True
+    )
+    yield from iter_json_array_objects(chunk.text for chunk in response)
@@ -0,0 +1,68 @@
+import hashlib
+import os
+import re
+import time
+from collections import Counter
+
+# Deterministic stand-in for the Gemini calls in ai_service, enabled with FOX_AI_STUB=1.
+# Together with src/mock_site.py it lets the whole pipeline (fetch -> parse -> dedup -> analyze ->
+# save -> indexes) run offline at any volume: no network, no API cost, no rate limit.
+# Outputs follow the JSON shapes the real prompts ask for; FOX_AI_STUB_LATENCY_MS simulates model latency.
+
+STUB_MODEL_NAME = "stub"    # ai_service uses this as MODEL_NAME, so stubbed rows get their own analysis_version
+STUB_LATENCY_MS = float(os.getenv("FOX_AI_STUB_LATENCY_MS", "0"))
+
+# Capitalized words that start sentences rather than name things
+NOT_KEYWORDS = {"The", "In", "It", "This", "That", "According", "Analysts", "Engineers", "Industry",
+                "Early", "Updated", "A", "An", "And", "But", "For", "With"}
+
+
+def _simulate_latency():
+    if STUB_LATENCY_MS:
+        time.sleep(STUB_LATENCY_MS / 1000)
+
+
+def _stable_int(text):
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _keyword_counts(content, limit=8):
+    # Acronyms (AI, GPU, LLM) and capitalized names (NVIDIA, OpenAI, Apple)
+    words = re.findall(r"\b(?:[A-Z]{2,}[0-9]*|[A-Z][a-z]+[A-Za-z0-9]*)\b", content)
+    counts = Counter(w for w in words if w not in NOT_KEYWORDS)
+    return dict(counts.most_common(limit))
+
+
+def analyze_tech_article(content):
+    _simulate_latency()
+    words = content.split()
+    return {
+        "summary": " ".join(words[:40]) + ("..." if len(words) > 40 else ""),
+        "keyword_counts": _keyword_counts(content),
+        "tech_level": _stable_int(content) % 10 + 1,     # 1-10, the scale the README documents
+        "impact_scope": ["Global"],
+    }
+
+
+def categorize_keywords_batch(keywords_list):
+    _simulate_latency()
+    categories = {}
+    for kw in keywords_list:
+        if kw.isupper() and len(kw) <= 5:
+            categories[kw] = "Technology"
+        elif kw[:1].isupper():
+            categories[kw] = "Company"
+        else:
+            categories[kw] = "Other"
+    return categories
+
+
+def generate_podcast_script(article_data):
+    _simulate_latency()
+    return [
+        {"speaker": "Jamie", "emotion": "excited", "text": f"Alex, did you see this one? {article_data['title']}"},
+        {"speaker": "Alex", "emotion": "curious", "text": "No, what happened?"},
+        {"speaker": "Jamie", "emotion": "confident", "text": article_data.get("summary") or "It's a big deal for tech."},
+        {"speaker": "Alex", "emotion": "thoughtful",
+         "text": f"That's a tech level {article_data.get('tech_level', 5)} story. Thanks for listening!"},
+    ]
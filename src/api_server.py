@@ -0,0 +1,287 @@
+import argparse
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from src.database_manager import (
+    DB_NAME, init_db, get_articles_version, get_meta_counter, search_articles_page, get_article_detail, get_db_stats
+)
+from src.keyword_analyzer import build_keyword_report
+from src.keyword_graph import find_keyword_neighbours
+from src.podcast_producer import get_best_article_of_day
+
+# Local read-only JSON API over fox_news.db for dashboards.
+# Handlers reuse the existing database_manager / podcast_producer query functions, which open their
+# own short-lived connections and only run SELECTs here (in WAL mode readers never block the scraper).
+# The per-thread read-only connection is used for the cache version check and the streamed export.
+# Responses are cached in memory until the articles or keyword_metadata tables change.
+#
+#   GET /api/stats
+#   GET /api/search?q=AI&type=title|date&limit=20&cursor_date=...&cursor_url=...
+#   GET /api/article?url=...
+#   GET /api/keywords
+#   GET /api/keywords/neighbours?keyword=NVIDIA&category=Person&k=10
+#   GET /api/best?date=YYYY-MM-DD
+#   GET /api/export          (streamed JSON array of all articles, not cached)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CACHE_MAX_ENTRIES = 256
+EXPORT_BATCH_SIZE = 200
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class ResponseCache:
+    """Small LRU of encoded responses, dropped as a whole when the data version moves."""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.version = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            if version != self.version:
+                # Articles were inserted/updated/deleted since these responses were built
+                self.entries.clear()
+                self.version = version
+            body = self.entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, version, body):
+        with self.lock:
+            if version != self.version:
+                return
+            self.entries[key] = body
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+_cache = ResponseCache()
+_local = threading.local()
+
+
+def _read_conn():
+    # One read-only connection per server thread
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{DB_NAME}?mode=ro", uri=True)
+        _local.conn = conn
+    return conn
+
+
+def _param(params, name, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def _int_param(params, name, default, minimum=1, maximum=100):
+    raw = _param(params, name)
+    if raw is None:
+        return default
+    try:
+        return max(minimum, min(maximum, int(raw)))
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer")
+
+
+# ----- Route handlers (return JSON-serializable data) -----
+def handle_stats(params):
+    # Cache counters are live, so do_GET adds them after the cache lookup (see _with_cache_counters)
+    return get_db_stats()
+
+
+def _with_cache_counters(body):
+    stats = json.loads(body)
+    with _cache.lock:
+        stats["cache"] = {"hits": _cache.hits, "misses": _cache.misses, "entries": len(_cache.entries)}
+    return json.dumps(stats, ensure_ascii=False).encode("utf-8")
+
+
+def handle_search(params):
+    search_type = _param(params, "type", "title")
+    if search_type not in ("title", "date"):
+        raise ApiError(400, "'type' must be 'title' or 'date'")
+
+    cursor = None
+    if _param(params, "cursor_date") and _param(params, "cursor_url"):
+        cursor = (_param(params, "cursor_date"), _param(params, "cursor_url"))
+
+    rows, next_cursor = search_articles_page(
+        _param(params, "q"), search_type, cursor=cursor, page_size=_int_param(params, "limit", 20)
+    )
+    return {
+        "results": [
+            {"title": title, "published_date": date, "tech_level": level, "url": url}
+            for title, date, level, url in rows
+        ],
+        "next_cursor": {"cursor_date": next_cursor[0], "cursor_url": next_cursor[1]} if next_cursor else None
+    }
+
+
+def handle_article(params):
+    url = _param(params, "url")
+    if not url:
+        raise ApiError(400, "'url' is required")
+    article = get_article_detail(url)
+    if not article:
+        raise ApiError(404, "article not found")
+    article["keyword_counts"] = json.loads(article["keyword_counts"] or "{}")
+    return article
+
+
+def handle_keywords(params):
+    # Read-only: never asks Gemini, new keywords are reported as "Uncategorized"
+    report = build_keyword_report(categorize_new=False, verbose=False) or {}
+    return {cat: [{"keyword": kw, "count": count} for kw, count in items] for cat, items in report.items()}
+
+
+def handle_neighbours(params):
+    keyword = _param(params, "keyword")
+    if not keyword:
+        raise ApiError(400, "'keyword' is required")
+    results = find_keyword_neighbours(keyword, _int_param(params, "k", 10), _param(params, "category"), persist=False)
+    return [{"keyword": kw, "count": count, "jaccard": jaccard} for kw, count, jaccard in results]
+
+
+def handle_best(params):
+    date = _param(params, "date")
+    if not date:
+        raise ApiError(400, "'date' is required")
+    article = get_best_article_of_day(date)
+    if not article:
+        raise ApiError(404, f"no articles on {date}")
+    article["keyword_counts"] = json.loads(article["keyword_counts"] or "{}")
+    return article
+
+
+ROUTES = {
+    "/api/stats": handle_stats,
+    "/api/search": handle_search,
+    "/api/article": handle_article,
+    "/api/keywords": handle_keywords,
+    "/api/keywords/neighbours": handle_neighbours,
+    "/api/best": handle_best,
+}
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        params = parse_qs(parts.query)
+
+        try:
+            if parts.path == "/api/export":
+                self._stream_export()
+                return
+
+            handler = ROUTES.get(parts.path)
+            if handler is None:
+                raise ApiError(404, f"unknown endpoint {parts.path}")
+
+            # Cache key ignores parameter order
+            key = (parts.path, tuple(sorted((k, tuple(v)) for k, v in params.items())))
+            # Keyword categories live outside the articles table, so both counters make up the version
+            conn = _read_conn()
+            version = (get_articles_version(conn), get_meta_counter("keywords_version", conn))
+            body = _cache.get(key, version)
+            cache_status = "HIT"
+            if body is None:
+                cache_status = "MISS"
+                body = json.dumps(handler(params), ensure_ascii=False).encode("utf-8")
+                _cache.put(key, version, body)
+
+            if parts.path == "/api/stats":
+                body = _with_cache_counters(body)
+            self._send(200, body, {"X-Cache": cache_status})
+
+        except ApiError as e:
+            self._send_error(e.status, e.message)
+        except Exception as e:
+            self._send_error(500, str(e))
+
+    def _send(self, status, body, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def _stream_export(self):
+        # Chunked JSON array, EXPORT_BATCH_SIZE rows at a time, so memory stays flat for big DBs
+        conn = _read_conn()
+        cursor = conn.cursor()
+        cursor.execute("SELECT * FROM articles ORDER BY published_date, url")
+        columns = [col[0] for col in cursor.description]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        self._write_chunk(b"[")
+        first = True
+        while True:
+            rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+            if not rows:
+                break
+            pieces = []
+            for row in rows:
+                pieces.append(("" if first else ",") + json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                first = False
+            self._write_chunk("\n".join(pieces).encode("utf-8"))
+        self._write_chunk(b"]")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        print(f"[API] {self.address_string()} {format % args}")
+
+
+def run_api_server(host=DEFAULT_HOST, port=DEFAULT_PORT):
+    init_db()  # Makes sure WAL mode, tables and change triggers exist
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    print(f"🌐 API listening on http://{host}:{port}/api/stats (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 API server stopped.")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local read-only JSON API over fox_news.db")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    run_api_server(args.host, args.port)
@@ -0,0 +1,124 @@
+from bs4 import BeautifulSoup
+from datetime import datetime
+
+# Pure HTML parsing helpers (no AI / DB imports) so they can run inside worker processes.
+
+# Helper function to convert Fox News date to YYYY-MM-DD
+def parse_fox_date(date_parts, fallback=None):
+    try:
+        raw_date_str = f"{date_parts[0]} {date_parts[1]} {date_parts[2]}"
+        raw_date_str = raw_date_str.replace(",", "")
+
+        # Parse and format
+        dt_obj = datetime.strptime(raw_date_str, "%B %d %Y")
+        return dt_obj.strftime("%Y-%m-%d")
+
+    except Exception as e:
+        print(f"⚠️ Date parsing failed: {date_parts} | Error: {e}")
+        return fallback or datetime.now().strftime("%Y-%m-%d") # Fallback to the caller's date, else today
+
+
+def parse_article_page(html, default_date=None):
+    """
+    Parse a Fox News article detail page.
+    Returns {"title", "published_date", "content"}; content is None if there is no article body.
+    default_date (YYYY-MM-DD, e.g. from a sitemap) is used when the page has no readable date, else today.
+    """
+    detail_soup = BeautifulSoup(html, "html.parser")
+
+    # 1. Title (listing pages give us one, sitemaps don't)
+    title = None
+    headline = detail_soup.find("h1", class_="headline")
+    if headline:
+        title = headline.get_text(strip=True)
+    else:
+        og_title = detail_soup.find("meta", attrs={"property": "og:title"})
+        if og_title and og_title.get("content"):
+            title = og_title["content"].strip()
+
+    # 2. Record Published Date
+    formatted_date = default_date or datetime.now().strftime("%Y-%m-%d")
+
+    date_span = detail_soup.find("span", class_="article-date")
+    if date_span:
+        time_tag = date_span.find("time")
+        if time_tag:
+            raw_time_text = time_tag.get_text(strip=True)
+            time_parts = raw_time_text.split(' ')
+            if len(time_parts) >= 3:
+                formatted_date = parse_fox_date(time_parts[:3], default_date)
+
+    # 3. Extract Content (.article-body)
+    content = None
+    body = detail_soup.find("div", class_="article-body")
+
+    if body:
+        # 4. Grab all paragraphs <p>
+        paragraphs = body.find_all("p")
+        content = "\n".join([p.get_text(strip=True) for p in paragraphs])
+
+    return {"title": title, "published_date": formatted_date, "content": content}
+
+
+def parse_listing_page(html, base_url="https://www.foxnews.com"):
+    """
+    Parse a Fox News section page (e.g. /tech) and keep the articles published within a day.
+    Returns a list of {"title", "url", "category", "time_label"} in page order.
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    listing = []
+
+    # Run for every fox news articles
+    for a in soup.find_all("article"):
+        # Find Tech Articles within a day -----------------
+
+        # 1. Find time tag (in class="meta")
+        meta_tag = a.find("div", class_="meta")
+        category = ""
+        time_label = None
+
+        if meta_tag:
+            time_text = meta_tag.get_text(separator=" ", strip=True).lower()
+            is_today = False
+
+            # 2. Filter out the news within a day
+            if "min" in time_text or "hour" in time_text:
+                is_today = True
+
+            if "1 day ago" in time_text:
+                is_today = True
+
+            if "video" in time_text: # no video clip
+                is_today = False
+
+            if not is_today:
+                continue
+
+            time_text_arr = time_text.split(' ')
+
+            while (time_text_arr and not str.isdigit(time_text_arr[0])):
+                category += (time_text_arr[0].capitalize() + " ")
+                del time_text_arr[0]
+
+            # Handle case where time_text_arr might be empty after processing
+            if len(time_text_arr) >= 3:
+                time_label = " ".join(time_text_arr[:3])
+
+        # 3. Find <title> tag in <article>
+        title_header = a.find("h4", class_="title")
+        link_tag = title_header.find("a") if title_header else None
+        if not link_tag or not link_tag.get("href"):
+            continue
+
+        # 4. Complete full Fox News url from the relative url
+        relative_url = link_tag.get("href")
+        full_url = relative_url if relative_url.startswith("http") else f"{base_url}{relative_url}"
+
+        listing.append({
+            "title": link_tag.get_text(strip=True),
+            "url": full_url,
+            "category": category,
+            "time_label": time_label,
+        })
+
+    return listing
@@ -0,0 +1,209 @@
+import argparse
+import os
+import sqlite3
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import requests
+
+from src.article_parser import parse_article_page
+from src.database_manager import init_db, is_article_exists
+from src.fox_scraper import BASE_URL, HEADERS, process_article, enable_incremental_indexes, fetch_article_html, fetch_throttle
+
+DB_NAME = "fox_news.db"
+
+# Historical backfill: enumerate article URLs from Fox News sitemaps, fetch them with threads
+# (I/O bound), parse them in a process pool (BeautifulSoup is CPU bound), then run the normal
+# dedup -> AI -> DB path. Progress is checkpointed per URL so an interrupted run can resume.
+
+SITEMAP_INDEX_URL = f"{BASE_URL}/sitemap.xml"
+SECTION_PATH = "/tech/"
+BATCH_SIZE = 200            # URLs per fetch/parse round (bounds memory and checkpoint granularity)
+
+# URLs with these statuses are not retried on the next run
+FINAL_STATUSES = ("saved", "duplicate", "no_body")
+
+SITEMAP_NS = {
+    "sm": "http://www.sitemaps.org/schemas/sitemap/0.9",
+    "news": "http://www.google.com/schemas/sitemap-news/0.9",
+}
+
+
+# ----- Sitemap enumeration -----
+def _entry_date(node):
+    # Prefer news:publication_date, fall back to lastmod. Returns YYYY-MM-DD or None.
+    for path in ("news:news/news:publication_date", "sm:lastmod"):
+        tag = node.find(path, SITEMAP_NS)
+        if tag is not None and tag.text:
+            return tag.text.strip()[:10]
+    return None
+
+
+def iter_sitemap_urls(start_date, end_date, sitemap_url=SITEMAP_INDEX_URL, section=SECTION_PATH):
+    """
+    Yields (url, date) for every article in `section` published between start_date and end_date.
+    Walks sitemap indexes recursively; child sitemaps last modified before start_date are skipped.
+    """
+    try:
+        res = requests.get(sitemap_url, headers=HEADERS, timeout=20)
+        res.raise_for_status()
+        root = ET.fromstring(res.content)
+    except Exception as e:
+        print(f"❌ Sitemap Error: {sitemap_url} | {e}")
+        return
+
+    if root.tag.endswith("sitemapindex"):
+        for child in root.findall("sm:sitemap", SITEMAP_NS):
+            loc = child.find("sm:loc", SITEMAP_NS)
+            if loc is None or not loc.text:
+                continue
+            lastmod = _entry_date(child)
+            if lastmod and lastmod < start_date:
+                continue
+            yield from iter_sitemap_urls(start_date, end_date, loc.text.strip(), section)
+        return
+
+    for entry in root.findall("sm:url", SITEMAP_NS):
+        loc = entry.find("sm:loc", SITEMAP_NS)
+        if loc is None or not loc.text:
+            continue
+        url = loc.text.strip()
+        entry_date = _entry_date(entry)
+        if section and section not in url:
+            continue
+        if entry_date and not (start_date <= entry_date <= end_date):
+            continue
+        yield url, entry_date
+
+
+# ----- Checkpoints -----
+def get_finished_urls():
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    placeholders = ", ".join("?" * len(FINAL_STATUSES))
+    c.execute(f"SELECT url FROM backfill_progress WHERE status IN ({placeholders})", FINAL_STATUSES)
+    finished = {row[0] for row in c.fetchall()}
+    conn.close()
+    return finished
+
+
+def mark_progress(url, status):
+    conn = sqlite3.connect(DB_NAME)
+    conn.execute(
+        "INSERT OR REPLACE INTO backfill_progress (url, status, updated_at) VALUES (?, ?, ?)",
+        (url, status, time.strftime("%Y-%m-%d %H:%M:%S"))
+    )
+    conn.commit()
+    conn.close()
+
+
+# ----- Pipeline -----
+def _analyze_and_save(url, parsed):
+    if not parsed["content"]:
+        return "no_body"
+    if process_article(parsed["title"] or url, url, parsed["published_date"], parsed["content"]):
+        return "saved"
+    # process_article returns False both for AI failures and for rows that already existed
+    return "duplicate" if is_article_exists(url) else "ai_failed"
+
+
+def _run_batch(entries, fetch_pool, parse_pool, ai_pool):
+    """entries: list of (url, sitemap_date); the sitemap date backs up pages without a readable date."""
+    counts = {}
+    sitemap_dates = dict(entries)
+
+    def record(url, status):
+        mark_progress(url, status)
+        counts[status] = counts.get(status, 0) + 1
+
+    # 1. Fetch concurrently; hand each page to the process pool as soon as it arrives
+    fetch_futures = {fetch_pool.submit(fetch_article_html, url): url for url, _ in entries}
+    parse_futures = {}
+    for future in as_completed(fetch_futures):
+        url = fetch_futures[future]
+        try:
+            parse_futures[parse_pool.submit(parse_article_page, future.result(), sitemap_dates[url])] = url
+        except Exception as e:
+            print(f"Fail to fetch Article Content: {url}, Error: {e}")
+            record(url, "fetch_failed")
+
+    # 2. Parsed pages go through the normal AI/DB path (ai_service enforces the rate limit)
+    ai_futures = {}
+    for future in as_completed(parse_futures):
+        url = parse_futures[future]
+        try:
+            ai_futures[ai_pool.submit(_analyze_and_save, url, future.result())] = url
+        except Exception as e:
+            print(f"❌ Parse Error: {url} | {e}")
+            record(url, "no_body")
+
+    for future in as_completed(ai_futures):
+        url = ai_futures[future]
+        try:
+            record(url, future.result())
+        except Exception as e:
+            print(f"❌ Backfill Error: {url} | {e}")
+            record(url, "ai_failed")
+
+    return counts
+
+
+def run_backfill(start_date, end_date, fetch_workers=16, parse_workers=None, ai_workers=4):
+    """
+    Backfill articles published between start_date and end_date (YYYY-MM-DD, inclusive).
+    parse_workers defaults to one process per CPU core.
+    """
+    init_db()
+    enable_incremental_indexes()
+    parse_workers = parse_workers or os.cpu_count() or 1
+
+    print(f"🗺️  Reading sitemaps for {start_date} → {end_date} ...")
+    finished = get_finished_urls()
+    pending = []
+    seen = set()
+    for url, entry_date in iter_sitemap_urls(start_date, end_date):
+        if url in seen or url in finished or is_article_exists(url):
+            continue
+        seen.add(url)
+        pending.append((url, entry_date))
+
+    if not pending:
+        print("✨ Nothing to backfill (all URLs in range are already processed).")
+        return
+
+    print(f"📚 {len(pending)} articles to backfill | fetch={fetch_workers} threads, "
+          f"parse={parse_workers} processes, ai={ai_workers} threads")
+
+    started = time.perf_counter()
+    totals = {}
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetch_pool, \
+            ProcessPoolExecutor(max_workers=parse_workers) as parse_pool, \
+            ThreadPoolExecutor(max_workers=ai_workers) as ai_pool:
+        for i in range(0, len(pending), BATCH_SIZE):
+            batch = pending[i:i + BATCH_SIZE]
+            counts = _run_batch(batch, fetch_pool, parse_pool, ai_pool)
+            for status, n in counts.items():
+                totals[status] = totals.get(status, 0) + n
+
+            done = min(i + BATCH_SIZE, len(pending))
+            print(f"💾 Checkpoint: {done}/{len(pending)} URLs processed | {totals}")
+            print(f"📈 Fetch metrics: {fetch_throttle.format_metrics()}")
+
+    print(f"✅ Backfill finished in {time.perf_counter() - started:.1f}s | {totals}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill Fox News tech articles from sitemaps.")
+    parser.add_argument("start_date", help="YYYY-MM-DD")
+    parser.add_argument("end_date", help="YYYY-MM-DD")
+    parser.add_argument("--fetch-workers", type=int, default=16)
+    parser.add_argument("--parse-workers", type=int, default=None)
+    parser.add_argument("--ai-workers", type=int, default=4)
+    args = parser.parse_args()
+
+    for value in (args.start_date, args.end_date):
+        datetime.strptime(value, "%Y-%m-%d")
+
+    run_backfill(args.start_date, args.end_date, args.fetch_workers, args.parse_workers, args.ai_workers)
@@ -2,8 +2,55 @@ import sqlite3
 import json
 import os
 
+from src.dedup import (
+    canonicalize_url, simhash, hamming_distance, lsh_bands,
+    to_sqlite_int, from_sqlite_int, NEAR_DUPLICATE_DISTANCE
+)
+
 DB_NAME = "fox_news.db"
 
+# Callbacks run after save_article_to_db inserts a new row (e.g. incremental indexes)
+_save_listeners = []
+
+
+def register_save_listener(callback):
+    # callback(article_data); registering the same callback twice is a no-op
+    if callback not in _save_listeners:
+        _save_listeners.append(callback)
+
+
+def _ensure_column(c, table, column, declaration):
+    # Lightweight migration: add a column to databases created by older versions
+    c.execute(f"PRAGMA table_info({table})")
+    if column not in [row[1] for row in c.fetchall()]:
+        c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+
+def _index_fingerprint(c, url, fingerprint):
+    c.executemany(
+        "INSERT OR IGNORE INTO simhash_bands (band, band_value, url) VALUES (?, ?, ?)",
+        [(band, value, url) for band, value in lsh_bands(fingerprint)]
+    )
+
+
+def _backfill_fingerprints(c):
+    # Fill canonical_url / simhash for rows saved before near-duplicate detection existed.
+    # canonical_url marks a row as processed: empty articles keep a NULL simhash for good.
+    c.execute("SELECT url, content FROM articles WHERE canonical_url IS NULL")
+    rows = c.fetchall()
+
+    for url, content in rows:
+        fingerprint = simhash(content or "")
+        c.execute(
+            "UPDATE articles SET canonical_url = ?, simhash = ? WHERE url = ?",
+            (canonicalize_url(url), to_sqlite_int(fingerprint) if fingerprint is not None else None, url)
+        )
+        if fingerprint is not None:
+            _index_fingerprint(c, url, fingerprint)
+
+    if rows:
+        print(f"[Database] Fingerprinted {len(rows)} existing articles.")
+
 def init_db():
     # Initialize the SQLite database and create the 'articles' table if it doesn't exist.
     # Ensure the database file is created in the same directory as the script or project root
@@ -11,6 +58,9 @@ def init_db():
     
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
+
+    # WAL lets readers (e.g. the HTTP API) run concurrently with the scraper writing
+    c.execute("PRAGMA journal_mode=WAL")
     
     # Create table with flattened fields for easy querying
     # 'url' is the PRIMARY KEY to prevent duplicate entries
@@ -29,6 +79,80 @@ def init_db():
         )
     ''')
 
+    # Near-duplicate detection columns (added later, so migrate older databases)
+    _ensure_column(c, "articles", "canonical_url", "TEXT")     # Normalized URL (no query/AMP suffix)
+    _ensure_column(c, "articles", "simhash", "INTEGER")        # 64-bit SimHash of content (signed)
+    _ensure_column(c, "articles", "revision_of", "TEXT")       # url of the original if this is a re-publish
+    _ensure_column(c, "articles", "analysis_version", "TEXT")  # hash of the prompt + model that produced the AI fields
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_canonical_url ON articles (canonical_url)")
+    # Revisions of an original (batch re-analysis updates, delete_article, report/stats filters)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_revision_of ON articles (revision_of)")
+    # Keyset pagination order for the article browser (newest first)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_articles_date_url ON articles (published_date, url)")
+
+    # LSH buckets over SimHash bands: near-duplicates share at least one (band, band_value)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS simhash_bands (
+            band INTEGER,
+            band_value INTEGER,
+            url TEXT,
+            PRIMARY KEY (band, band_value, url)
+        )
+    ''')
+    _backfill_fingerprints(c)
+
+    # Change counter for the articles table, bumped by triggers on every write.
+    # Readers compare it to know when cached responses are stale (works across processes).
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS db_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER
+        )
+    ''')
+    for key in ("articles_version", "articles_deletes", "analyses_generation", "keywords_version"):
+        c.execute("INSERT OR IGNORE INTO db_meta (key, value) VALUES (?, 0)", (key,))
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_articles_{event.lower()} AFTER {event} ON articles
+            BEGIN
+                UPDATE db_meta SET value = value + 1 WHERE key = 'articles_version';
+            END
+        ''')
+    # Deletes alone: a delete can free a rowid for reuse, so incremental indexes re-diff after one
+    c.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_articles_delete_count AFTER DELETE ON articles
+        BEGIN
+            UPDATE db_meta SET value = value + 1 WHERE key = 'articles_deletes';
+        END
+    ''')
+
+    # Distributed crawl queue (see work_queue.py): one job per URL, leased to one worker at a time
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS crawl_jobs (
+            url TEXT PRIMARY KEY,
+            title TEXT,
+            status TEXT,            -- pending / leased / done / failed
+            lease_owner TEXT,
+            lease_expires_at REAL,  -- Unix timestamp
+            heartbeat_at REAL,
+            attempts INTEGER DEFAULT 0,
+            result TEXT,            -- saved / duplicate / no_body / error message
+            enqueued_at TEXT,
+            finished_at TEXT
+        )
+    ''')
+    _ensure_column(c, "crawl_jobs", "not_before", "REAL")     # retry backoff: not claimable before this Unix timestamp
+    c.execute("CREATE INDEX IF NOT EXISTS idx_crawl_jobs_status ON crawl_jobs (status, lease_expires_at)")
+
+    # Checkpoints for the sitemap backfill (one row per processed URL)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS backfill_progress (
+            url TEXT PRIMARY KEY,
+            status TEXT,            -- saved / duplicate / no_body / ai_failed / fetch_failed
+            updated_at TEXT
+        )
+    ''')
+
     # Create table for persistent keyword categories
     c.execute('''
         CREATE TABLE IF NOT EXISTS keyword_metadata (
@@ -36,6 +160,29 @@ def init_db():
             category TEXT
         )
     ''')
+    # Category changes invalidate cached keyword responses (keywords_version in db_meta)
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        c.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_keyword_metadata_{event.lower()} AFTER {event} ON keyword_metadata
+            BEGIN
+                UPDATE db_meta SET value = value + 1 WHERE key = 'keywords_version';
+            END
+        ''')
+
+    # Create table for generated podcast scripts
+    # One script per (article, prompt version); input_hash detects edited article data
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS podcast_scripts (
+            url TEXT,
+            prompt_version TEXT,
+            input_hash TEXT,
+            published_date TEXT,    -- Format: YYYY-MM-DD
+            title TEXT,
+            script_json TEXT,       -- Stored as JSON string (list of lines)
+            created_at TEXT,
+            PRIMARY KEY (url, prompt_version)
+        )
+    ''')
     
     conn.commit()
     conn.close()
@@ -47,8 +194,8 @@ def is_article_exists(url):
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
 
-    # Query for the existence of the URL
-    c.execute("SELECT 1 FROM articles WHERE url = ?", (url,))
+    # Query for the existence of the URL (or the same story under a different query string / AMP link)
+    c.execute("SELECT 1 FROM articles WHERE url = ? OR canonical_url = ?", (url, canonicalize_url(url)))
     result = c.fetchone()
     
     conn.close()
@@ -57,6 +204,67 @@ def is_article_exists(url):
     return result is not None
 
 
+def get_meta_counter(key, conn=None):
+    # Current value of a db_meta change counter (see init_db)
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(DB_NAME)
+    row = conn.execute("SELECT value FROM db_meta WHERE key = ?", (key,)).fetchone()
+    if own_conn:
+        conn.close()
+    return row[0] if row else 0
+
+
+def get_articles_version(conn=None):
+    # Bumped on every insert/update/delete of articles
+    return get_meta_counter("articles_version", conn)
+
+
+def find_near_duplicate(content, max_distance=NEAR_DUPLICATE_DISTANCE):
+    """
+    Look up a stored article whose body is a near-duplicate of `content` (SimHash + LSH).
+    Returns {"url", "title", "distance", "ai_full_json", "analysis_version"} of the original article, or None.
+    """
+    fingerprint = simhash(content)
+    if fingerprint is None:
+        return None
+
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+
+    # Candidates: any article sharing at least one LSH band
+    bands = lsh_bands(fingerprint)
+    where = " OR ".join(["(b.band = ? AND b.band_value = ?)"] * len(bands))
+    params = [value for pair in bands for value in pair]
+    c.execute(f'''
+        SELECT DISTINCT a.url, a.simhash, a.revision_of
+        FROM simhash_bands b JOIN articles a ON a.url = b.url
+        WHERE {where}
+    ''', params)
+
+    best = None
+    for url, stored_hash, revision_of in c.fetchall():
+        if stored_hash is None:
+            continue
+        distance = hamming_distance(fingerprint, from_sqlite_int(stored_hash))
+        if distance <= max_distance and (best is None or distance < best[1]):
+            # Link to the original story, not to another revision of it
+            best = (revision_of or url, distance)
+
+    result = None
+    if best:
+        c.execute("SELECT url, title, ai_full_json, analysis_version FROM articles WHERE url = ?", (best[0],))
+        row = c.fetchone()
+        if row:
+            result = {
+                "url": row[0], "title": row[1], "distance": best[1],
+                "ai_full_json": row[2], "analysis_version": row[3]
+            }
+
+    conn.close()
+    return result
+
+
 def save_article_to_db(article_data):
     # Save a single article to the database.
     # Ignores the insert if the URL already exists (Deduplication).
@@ -73,12 +281,14 @@ def save_article_to_db(article_data):
         keyword_counts_str = json.dumps(ai_result.get("keyword_counts", {}), ensure_ascii=False)
         impact_scope_str = json.dumps(ai_result.get("impact_scope", []), ensure_ascii=False)
         full_json_str = json.dumps(ai_result, ensure_ascii=False)
+        fingerprint = simhash(article_data["content"])
 
         # INSERT OR IGNORE: The magic command for deduplication based on Primary Key (url)
         c.execute('''
             INSERT OR IGNORE INTO articles 
-            (url, title, published_date, crawled_at, summary, content, tech_level, keyword_counts, impact_scope, ai_full_json)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            (url, title, published_date, crawled_at, summary, content, tech_level, keyword_counts, impact_scope, ai_full_json,
+             canonical_url, simhash, revision_of, analysis_version)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
             article_data["url"],
             article_data["title"],
@@ -89,14 +299,27 @@ def save_article_to_db(article_data):
             ai_result.get("tech_level", 0),
             keyword_counts_str,
             impact_scope_str,
-            full_json_str
+            full_json_str,
+            canonicalize_url(article_data["url"]),
+            to_sqlite_int(fingerprint) if fingerprint is not None else None,
+            article_data.get("revision_of"),
+            article_data.get("analysis_version")
         ))
-        
+        inserted = c.rowcount > 0
+
+        if inserted and fingerprint is not None:
+            _index_fingerprint(c, article_data["url"], fingerprint)
+
         conn.commit()
         
         # Check if the row was actually inserted
-        if c.rowcount > 0:
+        if inserted:
             print(f"✅ [Database] Saved: {article_data['title'][:30]}...")
+            for callback in _save_listeners:
+                try:
+                    callback(article_data)
+                except Exception as e:
+                    print(f"⚠️ [Database] Save listener failed: {e}")
             return True
         else:
             print(f"⚠️ [Database] Skipped duplicate: {article_data['title'][:30]}...")
@@ -109,6 +332,108 @@ def save_article_to_db(article_data):
         conn.close()
 
 
+def get_podcast_script(url, prompt_version, input_hash):
+    # Return the stored script (list of lines) if it was generated from the same inputs, else None
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(
+        "SELECT script_json FROM podcast_scripts WHERE url = ? AND prompt_version = ? AND input_hash = ?",
+        (url, prompt_version, input_hash)
+    )
+    row = c.fetchone()
+    conn.close()
+
+    if not row:
+        return None
+    try:
+        return json.loads(row[0])
+    except json.JSONDecodeError:
+        return None
+
+
+def save_podcast_script(script_data):
+    # Insert or replace the script for (url, prompt_version)
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+
+    try:
+        c.execute('''
+            INSERT OR REPLACE INTO podcast_scripts
+            (url, prompt_version, input_hash, published_date, title, script_json, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            script_data["url"],
+            script_data["prompt_version"],
+            script_data["input_hash"],
+            script_data["published_date"],
+            script_data["title"],
+            json.dumps(script_data["script"], ensure_ascii=False),
+            script_data["created_at"]
+        ))
+        conn.commit()
+        return True
+
+    except Exception as e:
+        print(f"❌ [Database] Podcast Script Insert Error: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def get_podcast_scripts_in_range(start_date, end_date, prompt_version):
+    # Return stored scripts between two dates (inclusive) as a list of dicts, oldest first
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute('''
+        SELECT url, prompt_version, published_date, title, script_json, created_at
+        FROM podcast_scripts
+        WHERE published_date BETWEEN ? AND ? AND prompt_version = ?
+        ORDER BY published_date
+    ''', (start_date, end_date, prompt_version))
+    rows = [dict(row) for row in c.fetchall()]
+    conn.close()
+    return rows
+
+
+def update_article_analyses(updates):
+    """
+    Batch-update AI fields after a re-analysis, in one transaction.
+    updates: list of (url, ai_result, analysis_version). Revisions of each url get the same analysis.
+    """
+    rows = []
+    for url, ai_result, analysis_version in updates:
+        rows.append((
+            ai_result.get("summary", "N/A"),
+            ai_result.get("tech_level", 0),
+            json.dumps(ai_result.get("keyword_counts", {}), ensure_ascii=False),
+            json.dumps(ai_result.get("impact_scope", []), ensure_ascii=False),
+            json.dumps(ai_result, ensure_ascii=False),
+            analysis_version,
+            url,
+            url
+        ))
+
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    try:
+        c.executemany('''
+            UPDATE articles
+            SET summary = ?, tech_level = ?, keyword_counts = ?, impact_scope = ?, ai_full_json = ?, analysis_version = ?
+            WHERE url = ? OR revision_of = ?
+        ''', rows)
+        # keyword_counts changed in place: tells the keyword graph its counted pairs are stale
+        c.execute("UPDATE db_meta SET value = value + 1 WHERE key = 'analyses_generation'")
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ [Database] Batch Update Error: {e}")
+        return False
+    finally:
+        conn.close()
+
+
 # ===== Database Operations from User =====
 
 # opt1. Advanced search for the CLI dashboard
@@ -133,14 +458,74 @@ def search_articles_advanced(query=None, search_type="title"):
     conn.close()
     return results
 
+# Keyset-paginated version of search_articles_advanced for browsing large result sets
+def search_articles_page(query=None, search_type="title", cursor=None, page_size=10):
+    """
+    Returns (rows, next_cursor). Rows are (title, published_date, tech_level, url), newest first;
+    summary/content are left out, load them with get_article_detail() when an item is selected.
+    `cursor` is the (published_date, url) of the last row of the previous page;
+    next_cursor is None on the last page.
+    """
+    conditions = []
+    params = []
+
+    if query and search_type == "date":
+        conditions.append("published_date = ?")
+        params.append(query)
+    elif query:
+        conditions.append("title LIKE ?")
+        params.append(f'%{query}%')
+
+    if cursor:
+        # Seek past the previous page instead of OFFSET, so every page costs the same
+        conditions.append("(published_date, url) < (?, ?)")
+        params.extend(cursor)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT title, published_date, tech_level, url FROM articles
+        {where}
+        ORDER BY published_date DESC, url DESC
+        LIMIT ?
+    ''', params + [page_size + 1])
+    rows = c.fetchall()
+    conn.close()
+
+    # One extra row tells us whether there is a next page
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = (rows[-1][1], rows[-1][3])
+    return rows, next_cursor
+
+def get_article_detail(url):
+    """Lazily load the heavy fields (summary, content, keywords) of one article."""
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+    c.execute('''
+        SELECT url, title, published_date, tech_level, summary, content, keyword_counts, revision_of
+        FROM articles WHERE url = ?
+    ''', (url,))
+    row = c.fetchone()
+    conn.close()
+    return dict(row) if row else None
+
 def delete_article(url):
     """Deletes a single article by its URL."""
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
     try:
         c.execute("DELETE FROM articles WHERE url = ?", (url,))
+        deleted = c.rowcount > 0
+        c.execute("DELETE FROM simhash_bands WHERE url = ?", (url,))
+        # Revisions of a deleted original become standalone articles
+        c.execute("UPDATE articles SET revision_of = NULL WHERE revision_of = ?", (url,))
         conn.commit()
-        return c.rowcount > 0
+        return deleted
     except Exception as e:
         print(f"Error deleting article: {e}")
         return False
@@ -155,8 +540,10 @@ def get_db_stats():
     article_count = c.fetchone()[0]
     c.execute("SELECT COUNT(*) FROM keyword_metadata")
     keyword_count = c.fetchone()[0]
+    c.execute("SELECT COUNT(*) FROM articles WHERE revision_of IS NOT NULL")
+    revision_count = c.fetchone()[0]
     conn.close()
-    return {"articles": article_count, "keywords": keyword_count}
+    return {"articles": article_count, "keywords": keyword_count, "revisions": revision_count}
 
 
 # opt3. Exports all articles from SQLite to a JSON file
@@ -0,0 +1,96 @@
+import hashlib
+import re
+from collections import Counter
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# ----- Near-duplicate detection helpers -----
+# URL canonicalization catches the same story under different query strings / AMP links.
+# SimHash catches re-published or syndicated bodies under a different URL.
+
+SIMHASH_BITS = 64
+NEAR_DUPLICATE_DISTANCE = 3     # max differing bits to call two bodies near-duplicates
+LSH_BANDS = 4                   # 4 bands x 16 bits: hashes within 3 bits always share a band
+LSH_BAND_BITS = SIMHASH_BITS // LSH_BANDS
+
+SHINGLE_SIZE = 3                # word 3-grams
+
+TRACKING_PARAMS = {"intcmp", "cmpid", "ref", "fbclid", "gclid", "msockid", "dicbo"}
+FOX_HOSTS = {"foxnews.com", "www.foxnews.com", "m.foxnews.com"}
+
+
+def canonicalize_url(url):
+    """
+    Normalize an article URL so trivially different links map to the same key.
+    e.g. http://foxnews.com/tech/story.amp?intcmp=tw -> https://www.foxnews.com/tech/story
+    """
+    parts = urlsplit(url.strip())
+
+    host = parts.hostname or ""
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path)
+    if path.endswith(".amp"):
+        path = path[:-len(".amp")]
+    path = path.rstrip("/") or "/"
+
+    if host in FOX_HOSTS:
+        # Fox article identity lives entirely in the path; query strings are tracking/cache-busters
+        host = "www.foxnews.com"
+        query = ""
+    else:
+        params = [
+            (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+        ]
+        query = urlencode(sorted(params))
+
+    return urlunsplit(("https", host, path, query, ""))
+
+
+def simhash(text):
+    # 64-bit SimHash over word shingles. Returns None for empty text.
+    tokens = re.findall(r"[a-z0-9]+", text.lower())
+    if not tokens:
+        return None
+
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = Counter([" ".join(tokens)])
+    else:
+        shingles = Counter(
+            " ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)
+        )
+
+    weights = [0] * SIMHASH_BITS
+    for shingle, count in shingles.items():
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            if h >> bit & 1:
+                weights[bit] += count
+            else:
+                weights[bit] -= count
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a, b):
+    return bin((a ^ b) & ((1 << SIMHASH_BITS) - 1)).count("1")
+
+
+def lsh_bands(fingerprint):
+    # [(band_index, band_value), ...] used as LSH buckets
+    mask = (1 << LSH_BAND_BITS) - 1
+    return [(i, fingerprint >> (i * LSH_BAND_BITS) & mask) for i in range(LSH_BANDS)]
+
+
+def to_sqlite_int(fingerprint):
+    # SQLite INTEGER is signed 64-bit
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+def from_sqlite_int(value):
+    return value + (1 << 64) if value < 0 else value
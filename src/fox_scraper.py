@@ -1,39 +1,96 @@
+import os
 import requests
-import time # avoid DDoS detection
+import time
 import json
-from bs4 import BeautifulSoup
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Import AI module
-from src.ai_service import analyze_tech_article
+from src.ai_service import analyze_tech_article, get_analysis_version
 # Import Database module
-from src.database_manager import init_db, is_article_exists, save_article_to_db
+from src.database_manager import init_db, is_article_exists, save_article_to_db, find_near_duplicate
+# Import incremental indexes (related articles, keyword co-occurrence)
+from src.related_index import enable_auto_update as enable_related_index_updates
+from src.keyword_graph import enable_auto_update as enable_keyword_graph_updates
+# Import HTML parsing helpers
+from src.article_parser import parse_article_page, parse_listing_page
+# Import adaptive fetch throttle (replaces the fixed sleep between requests)
+from src.throttle import AdaptiveThrottle
+
+# Site root; point it at a local stand-in (python -m src.mock_site) for offline load tests
+BASE_URL = os.getenv("FOX_BASE_URL", "https://www.foxnews.com").rstrip("/")
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
+}
+
+# Shared by every article fetch in this process (scraper, backfill, work-queue worker)
+fetch_throttle = AdaptiveThrottle()
+
+
+def enable_incremental_indexes():
+    # Update the related-articles index and keyword graph whenever an article is saved
+    enable_related_index_updates()
+    enable_keyword_graph_updates()
+
+
+def fetch_article_html(url):
+    # Fetch an article detail page through the adaptive throttle
+    res = fetch_throttle.fetch(url, headers=HEADERS, timeout=10)
+    res.raise_for_status()
+    return res.text
+
+# Near-duplicate check + AI analysis + save for one extracted article. Returns True if saved.
+# can_save (optional) is asked right before saving; returning False drops the article (e.g. lost queue lease).
+def process_article(title, full_url, formatted_date, content, can_save=None):
+    # Re-published / syndicated stories reuse the original's analysis instead of calling Gemini again
+    duplicate = find_near_duplicate(content)
+    revision_of = None
+
+    if duplicate:
+        print(f"♻️  Near-duplicate of '{duplicate['title'][:30]}...' (distance {duplicate['distance']}), reusing its analysis")
+        ai_result = json.loads(duplicate["ai_full_json"])
+        revision_of = duplicate["url"]
+        analysis_version = duplicate["analysis_version"]
+    else:
+        # Using Google AI API to analyze
+        print("----- Google AI analyzing ... -----")
+        ai_result = analyze_tech_article(content)
+        analysis_version = get_analysis_version()
+
+    if not ai_result:
+        print("❌ AI Analysis Failed (returned None)")
+        return False
+
+    article_data = {
+        "title": title,
+        "url": full_url,
+        "published_date": formatted_date,
+        "crawled_at": time.strftime("%Y-%m-%d %H:%M:%S"), # fetch time
+        "content": content,
+        "ai_analysis": ai_result, # JSON (Dict) returned from AI
+        "revision_of": revision_of,
+        "analysis_version": analysis_version
+    }
 
-# Helper function to convert Fox News date to YYYY-MM-DD
-def parse_fox_date(date_parts):
-    try:
-        raw_date_str = f"{date_parts[0]} {date_parts[1]} {date_parts[2]}"
-        raw_date_str = raw_date_str.replace(",", "")
+    print(f"Title: {title}")
 
-        # Parse and format
-        dt_obj = datetime.strptime(raw_date_str, "%B %d %Y")
-        return dt_obj.strftime("%Y-%m-%d")
-    
-    except Exception as e:
-        print(f"⚠️ Date parsing failed: {date_parts} | Error: {e}")
-        return datetime.now().strftime("%Y-%m-%d") # Fallback to today
+    if can_save is not None and not can_save():
+        print("⚠️ Not saving: caller no longer allows it")
+        return False
+
+    # Save to Database directly
+    return save_article_to_db(article_data)
 
 
 # ----- Main Logic -----
-def run_scraper():
+def run_scraper(base_url=BASE_URL):
     # Initialize Database
     init_db()
+    enable_incremental_indexes()
 
     # Cmd + Shift + C on the web to check every objects' code
-    url = "https://www.foxnews.com/tech"
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7)"
-    }
+    url = f"{base_url}/tech"
+    headers = HEADERS
 
     # request
     try:
@@ -43,139 +100,64 @@ def run_scraper():
         print(f"❌ Connection Error: {e}")
         exit()
 
-    soup = BeautifulSoup(res.text, "html.parser")
-    articles = soup.find_all("article")
+    listing = parse_listing_page(res.text, base_url)
+
+    # Fetch detail pages concurrently; the throttle decides how many run at once
+    executor = ThreadPoolExecutor(max_workers=fetch_throttle.max_concurrency)
+    pages = {
+        item["url"]: executor.submit(fetch_article_html, item["url"])
+        for item in listing if not is_article_exists(item["url"])
+    }
 
     print("-" * 82)
-    article_index = 1
     article_count = 0
 
+    # Run for every fox news article published within a day
+    for article_index, item in enumerate(listing, 1):
+        title = item["title"]
+        full_url = item["url"]
 
-    # Run for every fox news articles
-    for a in articles:
-        # Find Tech Articles within a day -----------------
-
-        # 1. Find time tag (in class="meta")
-        meta_tag = a.find("div", class_="meta")
-        is_today = False
-
-        if meta_tag:
-            time_text = meta_tag.get_text(separator=" ", strip=True).lower()
-            # print(time_text)
-            
-            # 2. Filter out the news within a day
-            if "min" in time_text or "hour" in time_text:
-                is_today = True
-
-            if "1 day ago" in time_text:
-                is_today = True
+        if article_index < 10:
+            print(f"0{article_index}", end=" | ")
+        else:
+            print(f"{article_index}", end=" | ")
 
-            if "video" in time_text: # no video clip
-                is_today = False
-
-            if not is_today:
-                continue
-
-            time_text_arr = time_text.split(' ')
-            category = ""
-
-            while (time_text_arr and not str.isdigit(time_text_arr[0])):
-                category += (time_text_arr[0].capitalize() + " ")
-                del time_text_arr[0]
-
-
-            if article_index < 10:
-                print(f"0{article_index}", end=" | ")
-            else:
-                print(f"{article_index}", end=" | ")
-                
-
-            # Handle case where time_text_arr might be empty after processing
-            if len(time_text_arr) >= 3:
-                print(category + "| ", end="")
-                print(time_text_arr[0] + " " + time_text_arr[1] + " " + time_text_arr[2], end=" | ")
-            else:
-                print(category + "| Time Parsing format unexpected | \n")
-
-        # -------------------------------------------------
+        if item["time_label"]:
+            print(item["category"] + "| ", end="")
+            print(item["time_label"], end=" | ")
+        else:
+            print(item["category"] + "| Time Parsing format unexpected | \n")
 
         # Enter Article Content ---------------------------
-        # 1. Find <title> tag in <article>
-        title_header = a.find("h4", class_="title")
-        if title_header:
-            link_tag = title_header.find("a")
-            if link_tag:
-                article_index += 1
-                title = link_tag.get_text(strip=True)
-
-                # 2. Get article relative url
-                relative_url = link_tag.get("href")
-                # 3. Complete full Fox News url
-                full_url = relative_url if relative_url.startswith("http") else f"https://www.foxnews.com{relative_url}"
+        if full_url not in pages or is_article_exists(full_url):
+            print("Already analyzed")
+            print(f"\n⏩ Skipping: '{title[:30]}...'")
+            print("-" * 82)
+            continue
+
+        try:
+            # 1. Wait for the article detail page
+            html = pages[full_url].result()
+
+            # 2. Parse Published Date & Content (.article-body)
+            parsed = parse_article_page(html)
+            formatted_date = parsed["published_date"]
+            content = parsed["content"]
+            
+            if content is not None:
+                print(f"Length: {len(content.split())}")
                 
-                if is_article_exists(full_url):
-                    print("Already analyzed")
-                    print(f"\n⏩ Skipping: '{title[:30]}...'")
-                    print("-" * 82)
-                    continue
-
-                try:
-                    # 4. Request article detail page
-                    detail_res = requests.get(full_url, headers=headers, timeout=10)
-                    detail_soup = BeautifulSoup(detail_res.text, "html.parser")
-
-                    # 5. Record Published Date
-                    formatted_date = datetime.now().strftime("%Y-%m-%d")
-
-                    date_span = detail_soup.find("span", class_="article-date")
-                    if date_span:
-                        time_tag = date_span.find("time")
-                        if time_tag:
-                            raw_time_text = time_tag.get_text(strip=True)
-                            time_parts = raw_time_text.split(' ')
-                            if len(time_parts) >= 3:
-                                formatted_date = parse_fox_date(time_parts[:3])
-                    
-                    # 6. Extract Content (.article-body)
-                    body = detail_soup.find("div", class_="article-body")
-                    
-                    if body:
-                        # 7. Grab all paragraphs <p>
-                        paragraphs = body.find_all("p")
-                        content = "\n".join([p.get_text(strip=True) for p in paragraphs])
-                        print(f"Length: {len(content.split())}")
-                        
-                        # 8. Using Google AI API to analyze
-                        print("----- Google AI analyzing ... -----")
-                        ai_result = analyze_tech_article(content)
-
-                        if ai_result:
-                            article_data = {
-                                "title": title,
-                                "url": full_url,
-                                "published_date": formatted_date,
-                                "crawled_at": time.strftime("%Y-%m-%d %H:%M:%S"), # fetch time
-                                "content": content,
-                                "ai_analysis": ai_result # JSON (Dict) returned from AI
-                            }
-
-                            print(f"Title: {title}")
-
-                            # 9. Save to Database directly
-                            saved = save_article_to_db(article_data)
-                            if saved:
-                                article_count += 1
-
-                        else:
-                            print("❌ AI Analysis Failed (returned None)")
-
-                    time.sleep(1) # sleep to match human behavior
-                    
-                except Exception as e:
-                    print(f"Fail to fetch Article Content: {full_url}, Error: {e}")       
+                # 3. Dedup check, AI analysis, and save to Database
+                if process_article(title, full_url, formatted_date, content):
+                    article_count += 1
+            
+        except Exception as e:
+            print(f"Fail to fetch Article Content: {full_url}, Error: {e}")       
 
         print("-" * 82)
 
+    executor.shutdown()
+    print(f"📈 Fetch metrics: {fetch_throttle.format_metrics()}")
     print(f"Successfully added {article_count}Check 'fox_news.db' for results.")
 
 
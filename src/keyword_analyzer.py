@@ -2,6 +2,7 @@ import sqlite3
 import json
 from collections import Counter
 from src.ai_service import categorize_keywords_batch
+from src.keyword_graph import find_top_pairs
 
 DB_NAME = "fox_news.db"
 
@@ -26,19 +27,27 @@ def save_new_categories(category_dict):
     conn.commit()
     conn.close()
 
-def analyze_and_print():
+PREFERRED_ORDER = ["Technology", "Company", "Person", "Economy", "Product", "Location", "Other"]
+
+def build_keyword_report(categorize_new=True, verbose=True):
+    """
+    Aggregate keyword counts over all (non-revision) articles and group them by category.
+    Returns {category: [(keyword, count), ...]} in report order, or None if the DB is empty.
+    With categorize_new=False no Gemini call is made; unknown keywords stay "Uncategorized".
+    """
     conn = sqlite3.connect(DB_NAME)
     c = conn.cursor()
 
     # 1. Extraction: Get all keyword counts (JSON strings) from articles
-    print("📥 Reading data from database...")
-    c.execute("SELECT keyword_counts FROM articles")
+    # Revisions (near-duplicate re-publishes) share the original's keywords, so they are not counted again
+    if verbose:
+        print("📥 Reading data from database...")
+    c.execute("SELECT keyword_counts FROM articles WHERE revision_of IS NULL")
     rows = c.fetchall()
     conn.close()
 
     if not rows:
-        print("No articles found in database.")
-        return
+        return None
 
     # 2. Aggregation: Sum up frequencies using Counter
     total_counter = Counter()
@@ -52,7 +61,8 @@ def analyze_and_print():
                 continue
 
     unique_keywords = list(total_counter.keys())
-    print(f"📊 Total unique keywords found: {len(unique_keywords)}")
+    if verbose:
+        print(f"📊 Total unique keywords found: {len(unique_keywords)}")
 
     # 3. Incremental Categorization Logic
     # Load existing categories from DB
@@ -61,7 +71,7 @@ def analyze_and_print():
     # Identify keywords that have never been categorized by AI
     new_keywords = [kw for kw in unique_keywords if kw not in existing_categories]
 
-    if new_keywords:
+    if new_keywords and categorize_new:
         print(f"🤖 Found {len(new_keywords)} new keywords. Asking AI to categorize...")
         # Only send the NEW keywords to Gemini to save tokens
         new_category_map = categorize_keywords_batch(new_keywords)
@@ -71,10 +81,10 @@ def analyze_and_print():
         
         # Update local mapping for the current report
         existing_categories.update(new_category_map)
-    else:
+    elif not new_keywords and verbose:
         print("✨ All keywords are already categorized in the database.")
 
-    # 4. Grouping and Visualization
+    # 4. Grouping
     grouped_results = {}
     for kw, count in total_counter.most_common():
         cat = existing_categories.get(kw, "Uncategorized")
@@ -82,21 +92,35 @@ def analyze_and_print():
             grouped_results[cat] = []
         grouped_results[cat].append((kw, count))
 
+    all_categories = PREFERRED_ORDER + [k for k in grouped_results.keys() if k not in PREFERRED_ORDER]
+    return {cat: grouped_results[cat] for cat in all_categories if cat in grouped_results}
+
+def analyze_and_print():
+    grouped_results = build_keyword_report()
+
+    if grouped_results is None:
+        print("No articles found in database.")
+        return
+
     # 5. Formatted CLI Output
     print("\n" + "="*50)
     print("🔥 AGGREGATED KEYWORDS REPORT (Persistent) 🔥")
     print("="*50)
 
-    preferred_order = ["Technology", "Company", "Person", "Economy", "Product", "Location", "Other"]
-    all_categories = preferred_order + [k for k in grouped_results.keys() if k not in preferred_order]
-
-    for cat in all_categories:
-        if cat in grouped_results:
-            print(f"\n📂 [{cat}]")
-            print("-" * 40)
-            # Show top 10 items per category
-            for kw, count in grouped_results[cat][:10]: 
-                print(f" • {kw:<25} : {count} times")
+    for cat, items in grouped_results.items():
+        print(f"\n📂 [{cat}]")
+        print("-" * 40)
+        # Show top 10 items per category
+        for kw, count in items[:10]: 
+            print(f" • {kw:<25} : {count} times")
+
+    # 6. Keywords that appear together (co-occurrence graph)
+    top_pairs = find_top_pairs(10)
+    if top_pairs:
+        print(f"\n🔗 [Top Co-occurring Pairs]")
+        print("-" * 40)
+        for a, b, count in top_pairs:
+            print(f" • {a + ' + ' + b:<25} : {count} articles")
 
     print("\n" + "="*50)
 
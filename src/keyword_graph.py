@@ -0,0 +1,414 @@
+import argparse
+import atexit
+import csv
+import json
+import os
+import sqlite3
+import threading
+import time
+from xml.sax.saxutils import escape
+
+import numpy as np
+from scipy import sparse
+
+from src.database_manager import DB_NAME, register_save_listener, get_articles_version, get_meta_counter
+from src.sparse_store import save_bundle, load_bundle
+
+# Keyword co-occurrence engine for the keyword report.
+# A symmetric sparse matrix counts, for every keyword pair, how many articles mention both;
+# the diagonal holds each keyword's article frequency. New articles add their pairs
+# incrementally; revisions (near-duplicate re-publishes) are skipped like in the report.
+
+GRAPH_DIR = "keyword_graph"
+GRAPH_FILE = "graph.npz"
+SYNC_CHUNK_SIZE = 500           # URLs per IN (...) query when pulling new rows
+MERGE_ARTICLES = 256            # articles collected in the side block before it is summed into the matrix
+SAVE_INTERVAL_SECONDS = 60      # at most one full save per interval; pending changes are flushed at exit
+
+
+def _keywords_of(keyword_counts_json):
+    try:
+        return sorted(set(json.loads(keyword_counts_json or "{}")))
+    except (json.JSONDecodeError, TypeError):
+        return []
+
+
+def _iter_keywords(conn, urls):
+    # (url, keywords) for the given urls, read SYNC_CHUNK_SIZE at a time
+    for start in range(0, len(urls), SYNC_CHUNK_SIZE):
+        chunk = urls[start:start + SYNC_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        c = conn.execute(f"SELECT url, keyword_counts FROM articles WHERE url IN ({placeholders}) ORDER BY rowid", chunk)
+        for url, keyword_counts in c:
+            yield url, _keywords_of(keyword_counts)
+
+
+class KeywordGraph:
+    def __init__(self, graph_dir=GRAPH_DIR):
+        self.graph_dir = graph_dir
+        self.vocab = {}              # keyword -> index
+        self.keywords = []           # index -> keyword
+        self.matrix = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self.articles = 0            # articles that contributed keywords
+        self.urls = set()            # originals already counted, with or without keywords
+        self.synced_version = None   # articles_version at the last sync()
+        self.synced_deletes = None   # articles_deletes at the last sync()
+        self.synced_generation = None  # analyses_generation at the last sync()
+        self.last_rowid = 0          # highest articles.rowid seen by sync()
+        self._pending = ([], [])     # side block of pairs not yet in matrix (COO rows, cols), see add_articles
+        self._pending_articles = 0
+        self.dirty = False           # changed since the last save()
+        self.saved_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    # ----- Building -----
+    def add_articles(self, items):
+        """
+        Add articles: items is an iterable of (url, keywords). Their pairs go to a side block that
+        is summed into the matrix every MERGE_ARTICLES articles (or before a query/save/export),
+        so an insert doesn't copy the whole matrix. Returns articles with keywords.
+        """
+        with self.lock:
+            rows, cols = self._pending
+            added = 0
+            for url, keywords in items:
+                if url in self.urls:
+                    continue
+                self.urls.add(url)
+                self.dirty = True
+                keywords = sorted(set(keywords))
+                if not keywords:
+                    continue
+                ids = []
+                for kw in keywords:
+                    if kw not in self.vocab:
+                        self.vocab[kw] = len(self.keywords)
+                        self.keywords.append(kw)
+                    ids.append(self.vocab[kw])
+                # Every ordered pair, including (kw, kw) for the diagonal
+                rows.extend(i for i in ids for _ in ids)
+                cols.extend(j for _ in ids for j in ids)
+                added += 1
+
+            if added:
+                self.articles += added
+                self._pending_articles += added
+                if self._pending_articles >= MERGE_ARTICLES:
+                    self._merge()
+            return added
+
+    def _merge(self):
+        # Sum the side block of pending pairs into the matrix
+        with self.lock:
+            n = len(self.keywords)
+            if not self._pending_articles and self.matrix.shape == (n, n):
+                return
+            rows, cols = self._pending
+            delta = sparse.csr_matrix(
+                (np.ones(len(rows), dtype=np.int32), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+                shape=(n, n)
+            )
+            matrix = self.matrix
+            matrix.resize((n, n))
+            self.matrix = (matrix + delta).tocsr()
+            self._pending = ([], [])
+            self._pending_articles = 0
+
+    def reset(self):
+        with self.lock:
+            self.vocab, self.keywords = {}, []
+            self.matrix = sparse.csr_matrix((0, 0), dtype=np.int32)
+            self.articles = 0
+            self.urls = set()
+            self.synced_version = None
+            self.synced_deletes = None
+            self.synced_generation = None
+            self.last_rowid = 0
+            self._pending = ([], [])
+            self._pending_articles = 0
+
+    def sync(self, db_name=DB_NAME):
+        """
+        Catch up with originals written since the last sync (possibly by another process).
+        Normally only rows past last_rowid are read. After a delete (articles_deletes moved) the
+        counted URL set is diffed against the table instead: promoted revisions are added, and any
+        counted URL that is gone forces a rebuild, because its pairs can't be subtracted. So does a
+        re-analysis (analyses_generation moved), which rewrites keyword_counts in place.
+        Returns how many articles changed.
+        """
+        conn = sqlite3.connect(db_name)
+        try:
+            # Counters first: anything written after this point is caught by the next sync
+            version = get_articles_version(conn)
+            if version == self.synced_version:
+                return 0
+            deletes = get_meta_counter("articles_deletes", conn)
+            generation = get_meta_counter("analyses_generation", conn)
+
+            with self.lock:
+                removed = 0
+                if generation != self.synced_generation and self.urls:
+                    removed = len(self.urls)
+                    self.reset()
+                if deletes != self.synced_deletes:
+                    originals = {row[0] for row in conn.execute("SELECT url FROM articles WHERE revision_of IS NULL")}
+                    gone = len(self.urls - originals)
+                    if gone:
+                        removed += gone
+                        self.reset()
+                    new_urls = [url for url in originals if url not in self.urls]
+                    self.last_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM articles").fetchone()[0]
+                else:
+                    new_rows = conn.execute(
+                        "SELECT rowid, url, revision_of IS NULL FROM articles WHERE rowid > ? ORDER BY rowid",
+                        (self.last_rowid,)
+                    ).fetchall()
+                    new_urls = [url for _, url, is_original in new_rows if is_original and url not in self.urls]
+                    if new_rows:
+                        self.last_rowid = new_rows[-1][0]
+
+                self.add_articles(_iter_keywords(conn, new_urls))
+                self.synced_version = version
+                self.synced_deletes = deletes
+                self.synced_generation = generation
+        finally:
+            conn.close()
+
+        if new_urls or removed:
+            self.dirty = True
+        return len(new_urls) + removed
+
+    # ----- Queries -----
+    def neighbours(self, keyword, k=10, categories=None, category=None):
+        """
+        Top-k keywords co-occurring with `keyword`: [(keyword, count, jaccard), ...].
+        With `category` (and a {keyword: category} map) only neighbours of that category are returned.
+        """
+        with self.lock:
+            idx = self.vocab.get(keyword)
+            if idx is None:
+                return []
+            self._merge()
+
+            row = self.matrix.getrow(idx)
+            cols, counts = row.indices, row.data
+            df = self.matrix.diagonal()
+            results = []
+            for col, count in zip(cols, counts):
+                if col == idx:
+                    continue
+                other = self.keywords[col]
+                if category and (categories or {}).get(other) != category:
+                    continue
+                jaccard = count / (df[idx] + df[col] - count)
+                results.append((other, int(count), round(float(jaccard), 4)))
+
+        results.sort(key=lambda item: (-item[1], -item[2], item[0]))
+        return results[:k]
+
+    def top_pairs(self, k=10, categories=None, category=None):
+        """Most frequent keyword pairs overall, or with both ends in `category`."""
+        with self.lock:
+            self._merge()
+            upper = sparse.triu(self.matrix, k=1).tocoo()
+            order = np.argsort(-upper.data, kind="stable")
+            results = []
+            for i in order:
+                a, b = self.keywords[upper.row[i]], self.keywords[upper.col[i]]
+                if category and not ((categories or {}).get(a) == category and (categories or {}).get(b) == category):
+                    continue
+                results.append((a, b, int(upper.data[i])))
+                if len(results) >= k:
+                    break
+        return results
+
+    # ----- Export -----
+    def export_csv(self, filename, min_count=1):
+        with self.lock:
+            self._merge()
+            upper = sparse.triu(self.matrix, k=1).tocoo()
+            with open(filename, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(["source", "target", "weight"])
+                for a, b, w in zip(upper.row, upper.col, upper.data):
+                    if w >= min_count:
+                        writer.writerow([self.keywords[a], self.keywords[b], int(w)])
+
+    def export_graphml(self, filename, categories=None, min_count=1):
+        categories = categories or {}
+        with self.lock:
+            self._merge()
+            df = self.matrix.diagonal()
+            upper = sparse.triu(self.matrix, k=1).tocoo()
+            with open(filename, "w", encoding="utf-8") as f:
+                f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+                f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+                f.write('  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
+                f.write('  <key id="category" for="node" attr.name="category" attr.type="string"/>\n')
+                f.write('  <key id="articles" for="node" attr.name="articles" attr.type="int"/>\n')
+                f.write('  <key id="weight" for="edge" attr.name="weight" attr.type="int"/>\n')
+                f.write('  <graph id="keywords" edgedefault="undirected">\n')
+                for i, kw in enumerate(self.keywords):
+                    f.write(f'    <node id="n{i}"><data key="category">{escape(categories.get(kw, "Uncategorized"))}</data>'
+                            f'<data key="articles">{int(df[i])}</data><data key="label">{escape(kw)}</data></node>\n')
+                for a, b, w in zip(upper.row, upper.col, upper.data):
+                    if w >= min_count:
+                        f.write(f'    <edge source="n{a}" target="n{b}"><data key="weight">{int(w)}</data></edge>\n')
+                f.write('  </graph>\n</graphml>\n')
+
+    # ----- Persistence -----
+    def save(self):
+        with self.lock:
+            self._merge()
+            os.makedirs(self.graph_dir, exist_ok=True)
+            meta = {
+                "keywords": self.keywords,
+                "articles": self.articles,
+                "urls": sorted(self.urls),
+                "synced_version": self.synced_version,
+                "synced_deletes": self.synced_deletes,
+                "synced_generation": self.synced_generation,
+                "last_rowid": self.last_rowid,
+            }
+            save_bundle(os.path.join(self.graph_dir, GRAPH_FILE), self.matrix, meta)
+            self.dirty = False
+            self.saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, graph_dir=GRAPH_DIR):
+        graph = cls(graph_dir)
+        try:
+            bundle = load_bundle(os.path.join(graph_dir, GRAPH_FILE), np.int32)
+        except Exception as e:
+            print(f"⚠️ Keyword graph unreadable, starting fresh: {e}")
+            return graph
+        if bundle is None:
+            return graph
+
+        matrix, meta = bundle
+        n = len(meta["keywords"])
+        if matrix.shape != (n, n):
+            print("⚠️ Keyword graph file inconsistent, starting fresh.")
+            return graph
+
+        graph.keywords = meta["keywords"]
+        graph.vocab = {kw: i for i, kw in enumerate(graph.keywords)}
+        graph.matrix = matrix
+        graph.articles = meta["articles"]
+        graph.urls = set(meta["urls"])
+        graph.synced_version = meta.get("synced_version")
+        graph.synced_deletes = meta.get("synced_deletes")
+        graph.synced_generation = meta.get("synced_generation")
+        graph.last_rowid = meta.get("last_rowid", 0)
+        return graph
+
+
+# ----- Module-level helpers -----
+_graph = None
+_graph_lock = threading.Lock()
+_flush_registered = False
+
+
+def _flush_graph():
+    with _graph_lock:
+        if _graph is not None and _graph.dirty:
+            _graph.save()
+
+
+def get_graph(persist=True):
+    """
+    Loaded and synced singleton graph (catches up on rows written elsewhere).
+    With persist=False (read-only callers such as the HTTP API) nothing is written to disk.
+    """
+    global _graph, _flush_registered
+    with _graph_lock:
+        if _graph is None:
+            _graph = KeywordGraph.load()
+        _graph.sync()
+        if persist:
+            if not _flush_registered:
+                atexit.register(_flush_graph)
+                _flush_registered = True
+            if _graph.dirty and time.monotonic() - _graph.saved_at >= SAVE_INTERVAL_SECONDS:
+                _graph.save()
+        return _graph
+
+
+def rebuild_keyword_graph():
+    """Full rebuild, e.g. after a bulk re-analysis changed keyword_counts."""
+    global _graph
+    started = time.perf_counter()
+    with _graph_lock:
+        _graph = KeywordGraph()
+        _graph.sync()
+        _graph.save()
+    print(f"🔗 Keyword graph rebuilt: {len(_graph.keywords)} keywords from {_graph.articles} articles "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+def _on_article_saved(article_data):
+    # Add the saved original straight from article_data (revisions are skipped like in the report),
+    # then let the (cheap, rowid-based) sync pick up anything other processes added
+    with _graph_lock:
+        if _graph is not None and not article_data.get("revision_of"):
+            keyword_counts = (article_data.get("ai_analysis") or {}).get("keyword_counts") or {}
+            _graph.add_articles([(article_data["url"], keyword_counts)])
+    get_graph()
+
+
+def enable_auto_update():
+    """Keep the co-occurrence graph up to date as save_article_to_db inserts rows."""
+    register_save_listener(_on_article_saved)
+
+
+def _persisted_categories():
+    conn = sqlite3.connect(DB_NAME)
+    mapping = dict(conn.execute("SELECT keyword, category FROM keyword_metadata").fetchall())
+    conn.close()
+    return mapping
+
+
+def find_keyword_neighbours(keyword, k=10, category=None, persist=True):
+    categories = _persisted_categories() if category else None
+    return get_graph(persist).neighbours(keyword, k, categories, category)
+
+
+def find_top_pairs(k=10, category=None, persist=True):
+    categories = _persisted_categories() if category else None
+    return get_graph(persist).top_pairs(k, categories, category)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keyword co-occurrence graph")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild")
+    neighbours_cmd = sub.add_parser("neighbours")
+    neighbours_cmd.add_argument("keyword")
+    neighbours_cmd.add_argument("--category", default=None)
+    neighbours_cmd.add_argument("-k", type=int, default=10)
+    pairs_cmd = sub.add_parser("pairs")
+    pairs_cmd.add_argument("--category", default=None)
+    pairs_cmd.add_argument("-k", type=int, default=10)
+    export_cmd = sub.add_parser("export")
+    export_cmd.add_argument("filename", help="*.graphml or *.csv")
+    export_cmd.add_argument("--min-count", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        rebuild_keyword_graph()
+    elif args.command == "neighbours":
+        started = time.perf_counter()
+        results = find_keyword_neighbours(args.keyword, args.k, args.category)
+        for kw, count, jaccard in results:
+            print(f" • {kw:<25} : {count} articles (jaccard {jaccard})")
+        print(f"({len(results)} results in {(time.perf_counter() - started) * 1000:.1f} ms)")
+    elif args.command == "pairs":
+        for a, b, count in find_top_pairs(args.k, args.category):
+            print(f" • {a} + {b} : {count} articles")
+    else:
+        graph = get_graph()
+        if args.filename.endswith(".csv"):
+            graph.export_csv(args.filename, args.min_count)
+        else:
+            graph.export_graphml(args.filename, _persisted_categories(), args.min_count)
+        print(f"📦 Exported keyword graph to {args.filename}")
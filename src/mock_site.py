@@ -0,0 +1,261 @@
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+# Local stand-in for foxnews.com, for load and soak tests of the scraping pipeline.
+# It serves a /tech listing page, article detail pages and sitemaps in the same markup the
+# scraper parses (article, div.meta, h4.title, span.article-date, div.article-body), and can
+# inject latency, 500 errors, 429 throttling (with Retry-After) and slowly trickled bodies.
+#
+#   python -m src.mock_site --articles 1000 --latency-ms 150 --error-rate 0.02 --throttle-rate 0.05
+#   FOX_BASE_URL=http://127.0.0.1:8800 python main.py
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8800
+
+TOPICS = ["NVIDIA", "OpenAI", "Apple", "Google", "Microsoft", "Tesla", "TSMC", "Meta", "Amazon", "Intel"]
+TECH_TERMS = ["AI", "GPU", "LLM", "chip", "robotics", "quantum computing", "cybersecurity", "5G",
+              "data center", "smartphone", "cloud", "semiconductor", "autonomous driving", "AR headset"]
+FILLER = ["The company said", "Analysts expect", "According to the announcement", "Engineers confirmed",
+          "The report found", "Industry watchers note", "In a statement,", "Early benchmarks show"]
+
+
+class MockSiteConfig:
+    def __init__(self, articles=50, latency_ms=0, jitter_ms=0, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=2, slow_body_rate=0.0, slow_body_seconds=5.0, duplicate_rate=0.0,
+                 video_rate=0.1, old_rate=0.1, seed=42):
+        self.articles = articles
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.slow_body_rate = slow_body_rate
+        self.slow_body_seconds = slow_body_seconds
+        self.duplicate_rate = duplicate_rate    # share of articles re-publishing another article's body
+        self.video_rate = video_rate            # listing items marked as video (scraper skips them)
+        self.old_rate = old_rate                # listing items older than a day (scraper skips them)
+        self.seed = seed
+
+
+# ----- Synthetic content (deterministic per article id) -----
+def article_title(i, seed):
+    rng = random.Random(seed * 100003 + i)
+    return f"{rng.choice(TOPICS)} unveils new {rng.choice(TECH_TERMS)} push in synthetic story #{i}"
+
+
+def article_body(i, config):
+    rng = random.Random(config.seed * 100003 + i)
+    # Near-duplicates reuse an earlier article's body with a small update note appended
+    if i > 0 and rng.random() < config.duplicate_rate:
+        source = rng.randrange(i)
+        return article_body(source, config) + [f"Updated: story {source} was re-published as story {i}."]
+
+    topic = rng.choice(TOPICS)
+    paragraphs = []
+    for _ in range(rng.randint(6, 12)):
+        terms = rng.sample(TECH_TERMS, 3)
+        paragraphs.append(
+            f"{rng.choice(FILLER)} {topic} is investing in {terms[0]} and {terms[1]}, "
+            f"with {rng.randint(2, 90)}% gains reported for {terms[2]} workloads in article {i}."
+        )
+    return paragraphs
+
+
+def article_date(i):
+    return datetime(2026, 2, 7) - timedelta(days=i % 30)
+
+
+def listing_meta(i, config):
+    rng = random.Random(config.seed * 7919 + i)
+    if rng.random() < config.video_rate:
+        return "tech video 3 mins ago"
+    if rng.random() < config.old_rate:
+        return f"tech {rng.randint(2, 9)} days ago"
+    if i % 3 == 0:
+        return f"artificial intelligence {rng.randint(1, 59)} mins ago"
+    return f"tech {rng.randint(1, 23)} hours ago"
+
+
+def render_listing(config):
+    items = []
+    for i in range(config.articles):
+        items.append(
+            f'<article class="article"><div class="meta"><span class="eyebrow">{listing_meta(i, config)}</span></div>'
+            f'<h4 class="title"><a href="/tech/synthetic-article-{i}">{article_title(i, config.seed)}</a></h4></article>'
+        )
+    return f"<html><body><main>{''.join(items)}</main></body></html>"
+
+
+def render_article(i, config):
+    date = article_date(i)
+    date_text = f"{date.strftime('%B')} {date.day}, {date.year} 10:00am EST"
+    paragraphs = "".join(f"<p>{p}</p>" for p in article_body(i, config))
+    return (
+        f'<html><head><meta property="og:title" content="{article_title(i, config.seed)}"></head><body>'
+        f'<h1 class="headline speakable">{article_title(i, config.seed)}</h1>'
+        f'<span class="article-date"><time>{date_text}</time></span>'
+        f'<div class="article-body">{paragraphs}</div></body></html>'
+    )
+
+
+def render_sitemap_index(base_url):
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f'<sitemap><loc>{base_url}/sitemap-articles.xml</loc><lastmod>2026-02-07</lastmod></sitemap>'
+        '</sitemapindex>'
+    )
+
+
+def render_sitemap(base_url, config):
+    urls = "".join(
+        f"<url><loc>{base_url}/tech/synthetic-article-{i}</loc><lastmod>{article_date(i).strftime('%Y-%m-%d')}</lastmod></url>"
+        for i in range(config.articles)
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+
+
+# ----- Server -----
+class MockSiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = MockSiteConfig()
+    stats = {"requests": 0, "ok": 0, "errors": 0, "throttled": 0, "slow": 0, "not_found": 0}
+    stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        config = self.config
+        self._count("requests")
+
+        if path == "/__stats":
+            with self.stats_lock:
+                body = repr(dict(self.stats)).encode("utf-8")
+            self._send(200, body, "text/plain")
+            return
+
+        # Injected latency (applies to every page)
+        delay = config.latency_ms + (random.uniform(0, config.jitter_ms) if config.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000)
+
+        roll = random.random()
+        if roll < config.throttle_rate:
+            self._count("throttled")
+            self._send(429, b"Too Many Requests", "text/plain", {"Retry-After": str(config.retry_after)})
+            return
+        if roll < config.throttle_rate + config.error_rate:
+            self._count("errors")
+            self._send(random.choice([500, 503]), b"Server Error", "text/plain")
+            return
+
+        base_url = f"http://{self.headers.get('Host', f'{DEFAULT_HOST}:{DEFAULT_PORT}')}"
+        if path == "/tech":
+            body, content_type = render_listing(config), "text/html"
+        elif path.startswith("/tech/synthetic-article-"):
+            try:
+                i = int(path.rsplit("-", 1)[1])
+            except ValueError:
+                i = -1
+            if not 0 <= i < config.articles:
+                self._count("not_found")
+                self._send(404, b"Not Found", "text/plain")
+                return
+            body, content_type = render_article(i, config), "text/html"
+        elif path == "/sitemap.xml":
+            body, content_type = render_sitemap_index(base_url), "application/xml"
+        elif path == "/sitemap-articles.xml":
+            body, content_type = render_sitemap(base_url, config), "application/xml"
+        else:
+            self._count("not_found")
+            self._send(404, b"Not Found", "text/plain")
+            return
+
+        self._count("ok")
+        data = body.encode("utf-8")
+        if random.random() < config.slow_body_rate:
+            self._count("slow")
+            self._send_slowly(data, content_type)
+        else:
+            self._send(200, data, content_type)
+
+    def _send(self, status, data, content_type, extra_headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_slowly(self, data, content_type, chunks=10):
+        # Headers arrive at once, the body trickles in over slow_body_seconds
+        self.send_response(200)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        step = max(1, len(data) // chunks)
+        try:
+            for start in range(0, len(data), step):
+                self.wfile.write(data[start:start + step])
+                self.wfile.flush()
+                time.sleep(self.config.slow_body_seconds / chunks)
+        except (BrokenPipeError, ConnectionResetError):
+            pass    # Client gave up (e.g. its read timeout fired)
+
+    def log_message(self, format, *args):
+        pass    # Keep load tests quiet; see /__stats for counters
+
+
+def start_mock_site(config=None, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """Start the stand-in site in a background thread. Returns the server (call .shutdown() to stop)."""
+    handler = type("ConfiguredMockSiteHandler", (MockSiteHandler,), {
+        "config": config or MockSiteConfig(),
+        "stats": dict(MockSiteHandler.stats),
+        "stats_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Fox News stand-in site for load tests")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--articles", type=int, default=50, help="number of synthetic articles")
+    parser.add_argument("--latency-ms", type=float, default=0, help="fixed latency added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="random extra latency (0..jitter)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of 500/503 responses")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of 429 responses")
+    parser.add_argument("--retry-after", type=int, default=2, help="Retry-After seconds sent with 429")
+    parser.add_argument("--slow-body-rate", type=float, default=0.0, help="share of responses with a trickled body")
+    parser.add_argument("--slow-body-seconds", type=float, default=5.0)
+    parser.add_argument("--duplicate-rate", type=float, default=0.0, help="share of near-duplicate re-publishes")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    config = MockSiteConfig(
+        articles=args.articles, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, retry_after=args.retry_after,
+        slow_body_rate=args.slow_body_rate, slow_body_seconds=args.slow_body_seconds,
+        duplicate_rate=args.duplicate_rate, seed=args.seed
+    )
+    server = start_mock_site(config, args.host, args.port)
+    print(f"🧪 Mock Fox News site on http://{args.host}:{args.port}/tech ({args.articles} articles)")
+    print(f"   Point the scraper at it with FOX_BASE_URL=http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print("\n👋 Mock site stopped.")
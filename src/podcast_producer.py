@@ -1,9 +1,15 @@
 import sqlite3
 import json
 import os
-from src.ai_service import generate_podcast_script
+import hashlib
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.ai_service import generate_podcast_script, generate_podcast_script_stream, get_prompt_version
+from src.database_manager import get_podcast_script, save_podcast_script, get_podcast_scripts_in_range
 
 DB_NAME = "fox_news.db"
+PODCAST_PROMPT = "podcast_p1.txt"
 
 def get_best_article_of_day(target_date):
     # Finds the article with the highest tech_level for a specific date.
@@ -11,17 +17,15 @@ def get_best_article_of_day(target_date):
     conn.row_factory = sqlite3.Row # 讓我們可以用欄位名稱存取
     c = conn.cursor()
 
-    print(f"🔍 Searching for top tech news on {target_date}...")
-    
     # SQL Query: 選出日期符合，依照 tech_level 降序排列，只取第 1 筆
     c.execute('''
-        SELECT title, summary, content, keyword_counts, tech_level, url 
-        FROM articles 
-        WHERE published_date = ? 
-        ORDER BY tech_level DESC 
+        SELECT title, summary, content, keyword_counts, tech_level, url, published_date
+        FROM articles
+        WHERE published_date = ?
+        ORDER BY tech_level DESC, url
         LIMIT 1
     ''', (target_date,))
-    
+
     row = c.fetchone()
     conn.close()
 
@@ -30,64 +34,265 @@ def get_best_article_of_day(target_date):
     else:
         return None
 
-def produce_script(target_date):
-    # 1. Get the article
-    article = get_best_article_of_day(target_date)
-    
-    if not article:
-        print(f"⚠️ No articles found for date: {target_date}")
-        print("   (Check if the date format is YYYY-MM-DD or if you scraped news for that day)")
-        return
+ARTICLE_COLUMNS = ("title", "summary", "content", "keyword_counts", "tech_level", "url", "published_date")
 
-    print(f"✅ Found Top Article: {article['title']} (Level: {article['tech_level']})")
-    
-    # 2. Prepare data for AI (Convert JSON string back to dict)
-    try:
-        keywords_dict = json.loads(article['keyword_counts'])
-    except:
-        keywords_dict = {}
+def get_best_articles_in_range(start_date, end_date, columns=ARTICLE_COLUMNS):
+    # Same as get_best_article_of_day, but one article per date between start_date and end_date (inclusive).
+    # Ranking happens in SQLite, so only the winning rows (and only `columns`) are read into Python.
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    c = conn.cursor()
+
+    selected = ", ".join(columns)
+    c.execute(f'''
+        SELECT {selected}
+        FROM articles
+        WHERE rowid IN (
+            SELECT rowid FROM (
+                SELECT rowid, ROW_NUMBER() OVER (PARTITION BY published_date ORDER BY tech_level DESC, url) AS day_rank
+                FROM articles
+                WHERE published_date BETWEEN ? AND ?
+            )
+            WHERE day_rank = 1
+        )
+        ORDER BY published_date
+    ''', (start_date, end_date))
+
+    best_by_date = {row["published_date"]: dict(row) for row in c.fetchall()}
 
+    conn.close()
+    return best_by_date
+
+def _input_hash(article_data):
+    # Fingerprint of everything that goes into the prompt, so edited articles get a new script
+    raw = json.dumps(article_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _script_inputs(article):
+    # Returns (article_data, prompt_version, input_hash) used to generate and look up a script
     article_data = {
         "title": article['title'],
         "summary": article['summary'],
         "content": article['content'],
         "tech_level": article['tech_level']
     }
+    return article_data, get_prompt_version(PODCAST_PROMPT), _input_hash(article_data)
 
-    # 3. Generate Script
-    print("🎙️ Generating Podcast Script with AI...")
-    script_json = generate_podcast_script(article_data)
+def _store_script(article, prompt_version, input_hash, script_json):
+    save_podcast_script({
+        "url": article['url'],
+        "prompt_version": prompt_version,
+        "input_hash": input_hash,
+        "published_date": article['published_date'],
+        "title": article['title'],
+        "script": script_json,
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S")
+    })
+
+def get_or_generate_script(article, refresh=False):
+    """
+    Returns (script, from_store).
+    Serves the script from the podcast_scripts table when the article and prompt are unchanged,
+    otherwise asks Gemini and persists the new script.
+    """
+    article_data, prompt_version, input_hash = _script_inputs(article)
 
+    if not refresh:
+        stored = get_podcast_script(article['url'], prompt_version, input_hash)
+        if stored:
+            return stored, True
+
+    script_json = generate_podcast_script(article_data)
     if not script_json:
-        print("❌ Failed to generate script.")
-        return
+        return None, False
+
+    _store_script(article, prompt_version, input_hash, script_json)
+    return script_json, False
+
+def print_script_line(line):
+    speaker = line.get("speaker", "Unknown")
+    emotion = line.get("emotion", "neutral")
+    text = line.get("text", "")
 
-    # 4. Display Script nicely
+    # Color coding for terminal (Optional visual effect)
+    # Alex (Green), Jamie (Cyan)
+    if speaker == "Alex":
+        prefix = f"\033[92m[{speaker} ({emotion})]\033[0m" # Green
+    else:
+        prefix = f"\033[96m[{speaker} ({emotion})]\033[0m" # Cyan
+
+    print(f"{prefix}: {text}\n", flush=True)
+
+def print_script_header(target_date, title):
     print("\n" + "="*50)
     print(f"🎧 PODCAST SCRIPT: {target_date}")
-    print(f"📺 Topic: {article['title']}")
+    print(f"📺 Topic: {title}")
     print("="*50 + "\n")
 
+def print_script(target_date, title, script_json):
+    print_script_header(target_date, title)
     for line in script_json:
-        speaker = line.get("speaker", "Unknown")
-        emotion = line.get("emotion", "neutral")
-        text = line.get("text", "")
-        
-        # Color coding for terminal (Optional visual effect)
-        # Alex (Green), Jamie (Cyan)
-        if speaker == "Alex":
-            prefix = f"\033[92m[{speaker} ({emotion})]\033[0m" # Green
-        else:
-            prefix = f"\033[96m[{speaker} ({emotion})]\033[0m" # Cyan
-            
-        print(f"{prefix}: {text}\n")
-    
+        print_script_line(line)
     print("="*50)
-    
-    # (Future: Save to a .json file for TTS)
-    # with open(f"script_{target_date}.json", "w") as f:
-    #     json.dump(script_json, f, indent=4)
+
+def stream_script(article, sink=print_script_line, refresh=False):
+    """
+    Streaming counterpart of get_or_generate_script.
+    Each {speaker, emotion, text} line is handed to sink() as soon as Gemini finishes it
+    (e.g. print_script_line, or a TTS queue). The complete script is stored afterwards.
+    Returns (script, from_store).
+    """
+    article_data, prompt_version, input_hash = _script_inputs(article)
+
+    if not refresh:
+        stored = get_podcast_script(article['url'], prompt_version, input_hash)
+        if stored:
+            for line in stored:
+                sink(line)
+            return stored, True
+
+    script_json = []
+    started = time.perf_counter()
+    try:
+        for line in generate_podcast_script_stream(article_data):
+            if not script_json:
+                print(f"⏱️  First line after {time.perf_counter() - started:.2f}s\n")
+            sink(line)
+            script_json.append(line)
+
+    except Exception as e:
+        # Don't store a truncated script
+        print(f"❌ Podcast Streaming Failed after {len(script_json)} lines: {e}")
+        return None, False
+
+    if not script_json:
+        return None, False
+
+    print(f"⏱️  Full script after {time.perf_counter() - started:.2f}s")
+    _store_script(article, prompt_version, input_hash, script_json)
+    return script_json, False
+
+def produce_script(target_date, refresh=False, stream=False, sink=None):
+    # 1. Get the article
+    print(f"🔍 Searching for top tech news on {target_date}...")
+    article = get_best_article_of_day(target_date)
+
+    if not article:
+        print(f"⚠️ No articles found for date: {target_date}")
+        print("   (Check if the date format is YYYY-MM-DD or if you scraped news for that day)")
+        return
+
+    print(f"✅ Found Top Article: {article['title']} (Level: {article['tech_level']})")
+
+    # 2a. Streaming: render (or hand to the sink) each line as it arrives
+    if stream:
+        print("🎙️ Streaming Podcast Script from AI...")
+        print_script_header(target_date, article['title'])
+        script_json, from_store = stream_script(article, sink=sink or print_script_line, refresh=refresh)
+        if not script_json:
+            print("❌ Failed to generate script.")
+            return
+        if from_store:
+            print("💾 Loaded script from store (article and prompt unchanged).")
+        print("="*50)
+        return
+
+    # 2b. Generate Script (or reuse the stored one)
+    print("🎙️ Generating Podcast Script with AI...")
+    script_json, from_store = get_or_generate_script(article, refresh=refresh)
+
+    if not script_json:
+        print("❌ Failed to generate script.")
+        return
+
+    if from_store:
+        print("💾 Loaded script from store (article and prompt unchanged).")
+
+    # 3. Display Script nicely
+    print_script(target_date, article['title'], script_json)
+
+def produce_scripts_for_range(start_date, end_date, max_workers=4, refresh=False):
+    """
+    Batch mode: generate one script per date between start_date and end_date (YYYY-MM-DD, inclusive).
+    Gemini calls run concurrently; ai_service keeps them under the per-minute rate limit.
+    Returns {date: script} for every date that produced a script.
+    """
+    best_by_date = get_best_articles_in_range(start_date, end_date)
+
+    if not best_by_date:
+        print(f"⚠️ No articles found between {start_date} and {end_date}")
+        return {}
+
+    # Report dates in the range that have nothing to talk about
+    day = datetime.strptime(start_date, "%Y-%m-%d")
+    last_day = datetime.strptime(end_date, "%Y-%m-%d")
+    while day <= last_day:
+        date_str = day.strftime("%Y-%m-%d")
+        if date_str not in best_by_date:
+            print(f"⚠️ {date_str}: no articles, skipped")
+        day += timedelta(days=1)
+
+    print(f"🎙️ Producing {len(best_by_date)} scripts with up to {max_workers} workers...")
+
+    scripts = {}
+    generated = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(get_or_generate_script, article, refresh): date_str
+            for date_str, article in best_by_date.items()
+        }
+
+        for future in as_completed(futures):
+            date_str = futures[future]
+            title = best_by_date[date_str]['title']
+            try:
+                script_json, from_store = future.result()
+            except Exception as e:
+                print(f"❌ {date_str}: {e}")
+                continue
+
+            if not script_json:
+                print(f"❌ {date_str}: Failed to generate script.")
+                continue
+
+            scripts[date_str] = script_json
+            if from_store:
+                print(f"💾 {date_str}: from store | {title[:40]}...")
+            else:
+                generated += 1
+                print(f"✅ {date_str}: generated  | {title[:40]}...")
+
+    print(f"🎧 Done: {len(scripts)} scripts ({generated} new, {len(scripts) - generated} from store).")
+    return scripts
+
+def export_scripts_to_json(start_date, end_date, filename=None):
+    # Export stored scripts for the current prompt version in a TTS-friendly layout
+    if filename is None:
+        filename = f"podcast_scripts_{start_date}_{end_date}.json"
+
+    rows = get_podcast_scripts_in_range(start_date, end_date, get_prompt_version(PODCAST_PROMPT))
+    # One episode per date: scripts of articles that have since been overtaken as the day's best are skipped
+    best = get_best_articles_in_range(start_date, end_date, columns=("published_date", "url"))
+    best_urls = {date: article["url"] for date, article in best.items()}
+    episodes = []
+    for row in rows:
+        if best_urls.get(row["published_date"]) != row["url"]:
+            continue
+        episodes.append({
+            "date": row["published_date"],
+            "title": row["title"],
+            "url": row["url"],
+            "prompt_version": row["prompt_version"],
+            "lines": json.loads(row["script_json"])
+        })
+
+    try:
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(episodes, f, ensure_ascii=False, indent=4)
+        print(f"📦 Exported {len(episodes)} scripts to {os.path.abspath(filename)}")
+    except Exception as e:
+        print(f"❌ Export failed: {e}")
 
 if __name__ == "__main__":
     # Test run
-    produce_script("2026-02-07")
\ No newline at end of file
+    produce_script("2026-02-07")
@@ -0,0 +1,134 @@
+import argparse
+import math
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src.ai_service import analyze_tech_article, get_analysis_version, AI_REQUESTS_PER_MINUTE
+from src.database_manager import DB_NAME, init_db, update_article_analyses
+from src.keyword_graph import rebuild_keyword_graph
+
+# Bulk re-analysis of stored articles after tech_p2.txt or the Gemini model changes.
+# Rows whose analysis_version differs from the current prompt/model hash are streamed from SQLite
+# page by page, analyzed concurrently (ai_service keeps calls under the rate limit) and written
+# back in batched transactions. A finished row carries the new version, which doubles as the
+# checkpoint: re-running the job only picks up what is still stale.
+
+PAGE_SIZE = 100     # rows read from SQLite per query
+BATCH_SIZE = 20     # rows written per transaction
+
+
+def count_stale_articles(version):
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    c.execute(
+        "SELECT COUNT(*) FROM articles WHERE revision_of IS NULL AND (analysis_version IS NULL OR analysis_version != ?)",
+        (version,)
+    )
+    count = c.fetchone()[0]
+    conn.close()
+    return count
+
+
+def iter_stale_articles(version, page_size=PAGE_SIZE):
+    """Yields (url, content) for stale originals, keyset-paginated on rowid so memory stays flat."""
+    last_rowid = 0
+    while True:
+        conn = sqlite3.connect(DB_NAME)
+        c = conn.cursor()
+        c.execute(
+            '''
+            SELECT rowid, url, content FROM articles
+            WHERE revision_of IS NULL AND (analysis_version IS NULL OR analysis_version != ?) AND rowid > ?
+            ORDER BY rowid
+            LIMIT ?
+            ''', (version, last_rowid, page_size))
+        rows = c.fetchall()
+        conn.close()
+
+        if not rows:
+            return
+        for rowid, url, content in rows:
+            last_rowid = rowid
+            yield url, content
+
+
+def _analyze(url, content):
+    return url, analyze_tech_article(content or "")
+
+
+def run_reanalysis(workers=4, limit=None):
+    """Re-analyze every stale article (or the first `limit`). Returns (updated, failed)."""
+    init_db()
+    version = get_analysis_version()
+    stale = count_stale_articles(version)
+    if limit:
+        stale = min(stale, limit)
+
+    if not stale:
+        print(f"✨ All articles are up to date with analysis version {version}.")
+        return 0, 0
+
+    eta_minutes = math.ceil(stale / AI_REQUESTS_PER_MINUTE)
+    print(f"♻️  Re-analyzing {stale} articles with version {version} "
+          f"({workers} workers, ~{eta_minutes} min at {AI_REQUESTS_PER_MINUTE} requests/min)")
+
+    started = time.perf_counter()
+    updated = failed = 0
+    pending_updates = []
+
+    def flush():
+        nonlocal updated, failed
+        if not pending_updates:
+            return
+        if update_article_analyses(pending_updates):
+            updated += len(pending_updates)
+        else:
+            failed += len(pending_updates)
+        pending_updates.clear()
+        print(f"💾 Checkpoint: {updated}/{stale} updated, {failed} failed "
+              f"({time.perf_counter() - started:.0f}s elapsed)")
+
+    def collect(future):
+        nonlocal failed
+        url_done, ai_result = future.result()
+        if ai_result:
+            pending_updates.append((url_done, ai_result, version))
+        else:
+            failed += 1
+        if len(pending_updates) >= BATCH_SIZE:
+            flush()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for i, (url, content) in enumerate(iter_stale_articles(version)):
+            if limit and i >= limit:
+                break
+            in_flight.add(executor.submit(_analyze, url, content))
+
+            # Keep a bounded number of queued AI calls instead of submitting the whole archive
+            if len(in_flight) >= workers * 2:
+                done = next(as_completed(in_flight))
+                in_flight.remove(done)
+                collect(done)
+
+        for done in as_completed(in_flight):
+            collect(done)
+
+    flush()
+    print(f"✅ Re-analysis finished in {time.perf_counter() - started:.0f}s: {updated} updated, {failed} failed "
+          f"(failed rows keep their old version and are retried next run)")
+
+    if updated:
+        # keyword_counts changed in place, which the incremental graph can't follow
+        rebuild_keyword_graph()
+    return updated, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-analyze stored articles with the current prompt/model")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--limit", type=int, default=None, help="only re-analyze the first N stale articles")
+    args = parser.parse_args()
+
+    run_reanalysis(args.workers, args.limit)
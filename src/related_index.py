@@ -0,0 +1,380 @@
+import argparse
+import atexit
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from src.database_manager import DB_NAME, register_save_listener, get_articles_version, get_meta_counter
+from src.sparse_store import save_bundle, load_bundle
+
+# Local TF-IDF index for "related articles" / "similar to this text" queries.
+# Raw term counts live in a sparse CSR matrix (articles x vocabulary); TF-IDF weights are
+# derived from it on demand, so adding articles only appends rows (no full rebuild).
+
+INDEX_DIR = "related_index"
+INDEX_FILE = "index.npz"
+SYNC_CHUNK_SIZE = 500           # URLs per IN (...) query when pulling new rows
+MERGE_ROWS = 256                # new rows collected in the side block before it is stacked onto the matrix
+SAVE_INTERVAL_SECONDS = 60      # at most one full save per interval; pending changes are flushed at exit
+
+STOPWORDS = set("""
+a about after all also an and any are as at be been but by can could did do does for from had has
+have he her his how i if in into is it its just more most new no not of on one or our out over said
+says she so some than that the their them then there these they this to up was we were what when
+which who will with would you your
+""".split())
+
+
+def tokenize(text):
+    return [t for t in re.findall(r"[a-z0-9][a-z0-9+#.-]*[a-z0-9+#]|[a-z0-9]", text.lower())
+            if len(t) > 1 and t not in STOPWORDS]
+
+
+def _iter_documents(conn, urls):
+    # (url, "title\ncontent") for the given urls, read SYNC_CHUNK_SIZE at a time
+    for start in range(0, len(urls), SYNC_CHUNK_SIZE):
+        chunk = urls[start:start + SYNC_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        c = conn.execute(f"SELECT url, title, content FROM articles WHERE url IN ({placeholders}) ORDER BY rowid", chunk)
+        for url, title, content in c:
+            yield url, f"{title or ''}\n{content or ''}"
+
+
+class RelatedArticlesIndex:
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.urls = []               # row -> url
+        self.url_to_row = {}
+        self.vocab = {}              # term -> column
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.float32)
+        self.df = np.zeros(0, dtype=np.int64)
+        self.synced_version = None   # articles_version at the last sync()
+        self.synced_deletes = None   # articles_deletes at the last sync()
+        self.last_rowid = 0          # highest articles.rowid seen by sync()
+        self._pending = ([], [], []) # side block of new rows (COO rows, cols, vals), see add_documents
+        self._pending_rows = 0
+        self._weighted = None        # cached L2-normalized TF-IDF matrix
+        self.dirty = False           # changed since the last save()
+        self.saved_at = time.monotonic()
+        self.lock = threading.RLock()
+
+    # ----- Building -----
+    def add_documents(self, docs):
+        """
+        Append articles: docs is an iterable of (url, text). New rows go to a small side block
+        that is stacked onto the matrix every MERGE_ROWS rows (or before a query/save), so an
+        insert doesn't copy the whole matrix. Returns how many were added.
+        """
+        with self.lock:
+            rows, cols, vals = self._pending
+            added = 0
+            for url, text in docs:
+                if url in self.url_to_row:
+                    continue
+                # Articles without terms still get an (empty) row so they are not re-read every sync
+                term_counts = Counter(tokenize(text))
+                rows.extend([self._pending_rows] * len(term_counts))
+                cols.extend([self.vocab.setdefault(term, len(self.vocab)) for term in term_counts])
+                vals.extend(term_counts.values())
+                self.url_to_row[url] = len(self.urls)
+                self.urls.append(url)
+                self._pending_rows += 1
+                added += 1
+
+            if added:
+                self._weighted = None
+                self.dirty = True
+            if self._pending_rows >= MERGE_ROWS:
+                self._merge()
+            return added
+
+    def _merge(self):
+        # Stack the side block of new rows onto the matrix and update document frequencies
+        with self.lock:
+            n_terms = len(self.vocab)
+            if not self._pending_rows and self.counts.shape[1] == n_terms:
+                return
+            rows, cols, vals = self._pending
+            cols = np.array(cols, dtype=np.int64)
+            block = sparse.csr_matrix(
+                (np.array(vals, dtype=np.float32), (np.array(rows, dtype=np.int64), cols)),
+                shape=(self._pending_rows, n_terms)
+            )
+            counts = self.counts
+            counts.resize((counts.shape[0], n_terms))
+            self.counts = sparse.vstack([counts, block], format="csr")
+
+            df = np.zeros(n_terms, dtype=np.int64)
+            df[:len(self.df)] = self.df
+            self.df = df + np.bincount(cols, minlength=n_terms)
+
+            self._pending = ([], [], [])
+            self._pending_rows = 0
+
+    def remove_documents(self, urls):
+        """Drop rows of deleted articles. Returns how many were removed."""
+        with self.lock:
+            drop = {self.url_to_row[url] for url in urls if url in self.url_to_row}
+            if not drop:
+                return 0
+            self._merge()
+            keep = np.array([i for i in range(len(self.urls)) if i not in drop], dtype=np.int64)
+            self.counts = self.counts[keep]
+            self.urls = [self.urls[i] for i in keep]
+            self.url_to_row = {url: i for i, url in enumerate(self.urls)}
+            self.df = np.bincount(self.counts.indices, minlength=self.counts.shape[1]).astype(np.int64)
+            self._weighted = None
+            self.dirty = True
+            return len(drop)
+
+    def sync(self, db_name=DB_NAME):
+        """
+        Catch up with rows written since the last sync (possibly by another process).
+        Normally only rows past last_rowid are read. A delete can free a rowid for reuse, so after
+        one (articles_deletes moved) the indexed URL set is diffed against the table instead.
+        Returns how many rows changed.
+        """
+        conn = sqlite3.connect(db_name)
+        try:
+            # Counters first: anything written after this point is caught by the next sync
+            version = get_articles_version(conn)
+            if version == self.synced_version:
+                return 0
+            deletes = get_meta_counter("articles_deletes", conn)
+
+            with self.lock:
+                removed = 0
+                if deletes != self.synced_deletes:
+                    table = dict(conn.execute("SELECT url, rowid FROM articles"))
+                    removed = self.remove_documents([url for url in self.urls if url not in table])
+                    new_urls = [url for url in table if url not in self.url_to_row]
+                    self.last_rowid = max(table.values(), default=0)
+                else:
+                    new_rows = conn.execute(
+                        "SELECT rowid, url FROM articles WHERE rowid > ? ORDER BY rowid", (self.last_rowid,)
+                    ).fetchall()
+                    new_urls = [url for _, url in new_rows if url not in self.url_to_row]
+                    if new_rows:
+                        self.last_rowid = new_rows[-1][0]
+
+                added = self.add_documents(_iter_documents(conn, new_urls))
+                self.synced_version = version
+                self.synced_deletes = deletes
+        finally:
+            conn.close()
+        return added + removed
+
+    # ----- Weighting -----
+    def _idf(self):
+        n_docs = len(self.urls)
+        return (np.log((1 + n_docs) / (1 + self.df)) + 1).astype(np.float32)
+
+    def _normalize(self, matrix):
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        return sparse.diags(1 / norms) @ matrix
+
+    def _tfidf(self, counts):
+        # Sublinear tf (1 + log tf) so one repeated word doesn't dominate
+        weighted = counts.copy()
+        weighted.data = 1 + np.log(weighted.data)
+        return self._normalize(weighted @ sparse.diags(self._idf()))
+
+    def weighted_matrix(self):
+        with self.lock:
+            self._merge()
+            if self._weighted is None:
+                self._weighted = self._tfidf(self.counts).tocsr()
+            return self._weighted
+
+    def vectorize(self, text):
+        term_counts = Counter(t for t in tokenize(text) if t in self.vocab)
+        cols = [self.vocab[t] for t in term_counts]
+        row = sparse.csr_matrix(
+            (np.array(list(term_counts.values()), dtype=np.float32), (np.zeros(len(cols), dtype=np.int64), cols)),
+            shape=(1, len(self.vocab))
+        )
+        return self._tfidf(row)
+
+    # ----- Queries -----
+    def _top_k(self, query_vector, k, exclude_row=None):
+        matrix = self.weighted_matrix()
+        if matrix.shape[0] == 0:
+            return []
+
+        scores = (matrix @ query_vector.T).toarray().ravel()
+        if exclude_row is not None:
+            scores[exclude_row] = -1
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.urls[i], float(scores[i])) for i in top if scores[i] > 0]
+
+    def related(self, url, k=5):
+        """[(url, score), ...] for the k articles most similar to an indexed article."""
+        with self.lock:
+            row = self.url_to_row.get(url)
+            if row is None:
+                return []
+            return self._top_k(self.weighted_matrix()[row], k, exclude_row=row)
+
+    def similar_to_text(self, text, k=5):
+        with self.lock:
+            if not self.vocab:
+                return []
+            return self._top_k(self.vectorize(text), k)
+
+    # ----- Persistence -----
+    def save(self):
+        with self.lock:
+            self._merge()
+            os.makedirs(self.index_dir, exist_ok=True)
+            meta = {
+                "urls": self.urls,
+                "vocab": sorted(self.vocab, key=self.vocab.get),
+                "synced_version": self.synced_version,
+                "synced_deletes": self.synced_deletes,
+                "last_rowid": self.last_rowid,
+            }
+            save_bundle(os.path.join(self.index_dir, INDEX_FILE), self.counts, meta)
+            self.dirty = False
+            self.saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR):
+        index = cls(index_dir)
+        try:
+            bundle = load_bundle(os.path.join(index_dir, INDEX_FILE), np.float32)
+        except Exception as e:
+            print(f"⚠️ Related index unreadable, starting fresh: {e}")
+            return index
+        if bundle is None:
+            return index
+
+        counts, meta = bundle
+        if counts.shape != (len(meta["urls"]), len(meta["vocab"])):
+            print("⚠️ Related index file inconsistent, starting fresh.")
+            return index
+
+        index.urls = meta["urls"]
+        index.url_to_row = {url: i for i, url in enumerate(index.urls)}
+        index.vocab = {term: i for i, term in enumerate(meta["vocab"])}
+        index.counts = counts
+        index.df = np.bincount(counts.indices, minlength=counts.shape[1]).astype(np.int64)
+        index.synced_version = meta.get("synced_version")
+        index.synced_deletes = meta.get("synced_deletes")
+        index.last_rowid = meta.get("last_rowid", 0)
+        return index
+
+
+# ----- Module-level helpers -----
+_index = None
+_index_lock = threading.Lock()
+_flush_registered = False
+
+
+def _flush_index():
+    with _index_lock:
+        if _index is not None and _index.dirty:
+            _index.save()
+
+
+def get_index(persist=True):
+    """
+    Loaded and synced singleton index (catches up on rows written elsewhere).
+    With persist=False (read-only callers) nothing is written to disk.
+    """
+    global _index, _flush_registered
+    with _index_lock:
+        if _index is None:
+            _index = RelatedArticlesIndex.load()
+        _index.sync()
+        if persist:
+            if not _flush_registered:
+                atexit.register(_flush_index)
+                _flush_registered = True
+            if _index.dirty and time.monotonic() - _index.saved_at >= SAVE_INTERVAL_SECONDS:
+                _index.save()
+        return _index
+
+
+def _on_article_saved(article_data):
+    # Append the saved article straight from article_data, then let the (cheap, rowid-based) sync
+    # pick up anything other processes added; it skips this URL since it is already indexed
+    with _index_lock:
+        if _index is not None:
+            text = f"{article_data.get('title') or ''}\n{article_data.get('content') or ''}"
+            _index.add_documents([(article_data["url"], text)])
+    get_index()
+
+
+def enable_auto_update():
+    """Keep the index up to date as save_article_to_db inserts rows."""
+    register_save_listener(_on_article_saved)
+
+
+def _with_titles(results):
+    # Attach titles, dropping articles that were deleted since they were indexed
+    if not results:
+        return []
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+    placeholders = ", ".join("?" * len(results))
+    c.execute(f"SELECT url, title, published_date FROM articles WHERE url IN ({placeholders})", [u for u, _ in results])
+    info = {row[0]: row[1:] for row in c.fetchall()}
+    conn.close()
+    return [
+        {"url": url, "title": info[url][0], "published_date": info[url][1], "score": round(score, 4)}
+        for url, score in results if url in info
+    ]
+
+
+def find_related_articles(url, k=5):
+    return _with_titles(get_index().related(url, k + 5))[:k]
+
+
+def find_similar_to_text(text, k=5):
+    return _with_titles(get_index().similar_to_text(text, k + 5))[:k]
+
+
+def rebuild_index():
+    global _index
+    started = time.perf_counter()
+    with _index_lock:
+        _index = RelatedArticlesIndex()
+        _index.sync()
+        _index.save()
+    print(f"🧭 Related index rebuilt: {len(_index.urls)} articles, {len(_index.vocab)} terms "
+          f"in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TF-IDF related-articles index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("rebuild")
+    related_cmd = sub.add_parser("related")
+    related_cmd.add_argument("url")
+    similar_cmd = sub.add_parser("similar")
+    similar_cmd.add_argument("text")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        rebuild_index()
+    else:
+        started = time.perf_counter()
+        if args.command == "related":
+            results = find_related_articles(args.url)
+        else:
+            results = find_similar_to_text(args.text)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        for item in results:
+            print(f"{item['score']:.3f} | {item['published_date']} | {item['title'][:60]}")
+        print(f"({len(results)} results in {elapsed_ms:.1f} ms)")
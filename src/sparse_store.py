@@ -0,0 +1,39 @@
+import json
+import os
+import threading
+
+import numpy as np
+from scipy import sparse
+
+# On-disk format shared by the related-articles index and the keyword graph.
+# The CSR matrix and its JSON metadata go into a single .npz written to a temp file and
+# os.replace()d into place, so concurrent savers (backfill, queue workers, the scraper) can only
+# ever leave one complete file behind: the last writer wins and readers never see a torn pair.
+
+
+def save_bundle(path, matrix, meta):
+    matrix = matrix.tocsr()
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(
+            f,
+            data=matrix.data,
+            indices=matrix.indices,
+            indptr=matrix.indptr,
+            shape=np.array(matrix.shape, dtype=np.int64),
+            meta=np.frombuffer(json.dumps(meta, ensure_ascii=False).encode("utf-8"), dtype=np.uint8),
+        )
+    os.replace(tmp_path, path)
+
+
+def load_bundle(path, dtype):
+    """Returns (csr_matrix, meta) or None if the file does not exist. Raises on unreadable files."""
+    if not os.path.exists(path):
+        return None
+    with np.load(path, allow_pickle=False) as bundle:
+        matrix = sparse.csr_matrix(
+            (bundle["data"].astype(dtype), bundle["indices"], bundle["indptr"]),
+            shape=tuple(bundle["shape"])
+        )
+        meta = json.loads(bundle["meta"].tobytes().decode("utf-8"))
+    return matrix, meta
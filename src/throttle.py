@@ -0,0 +1,183 @@
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# Adaptive throttling for article fetches (AIMD + circuit breaker).
+# - Concurrency grows by +1 after a window of healthy responses (fast, no errors).
+# - 429 / 503 / timeouts / very slow responses halve it; Retry-After pauses all fetches, and the
+#   throttled request itself is retried once the pause has passed.
+# - FAILURE_THRESHOLD consecutive failures open the circuit: fetches fail fast until the
+#   cooldown passes, then a single probe request decides whether to close it again.
+
+THROTTLE_STATUSES = {429, 503}
+DEFAULT_RETRY_DELAY = 2.0      # seconds before retrying a throttled fetch that sent no Retry-After
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+def parse_retry_after(value):
+    """Retry-After header (seconds or HTTP date) -> seconds to wait, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveThrottle:
+    def __init__(self, min_concurrency=1, max_concurrency=16, initial_concurrency=2,
+                 target_latency=2.0, decrease_factor=0.5, failure_threshold=5,
+                 cooldown_seconds=60, max_retry_after=300):
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.limit = float(initial_concurrency)
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_retry_after = max_retry_after
+
+        self.in_flight = 0
+        self.healthy_streak = 0
+        self.consecutive_failures = 0
+        self.paused_until = 0.0
+        self.circuit_state = "closed"      # closed / open / half_open
+        self.circuit_opened_at = 0.0
+
+        # Metrics
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self.latency_ewma = None
+        self.completed_at = deque()         # completion timestamps for the rate window
+
+        self.cond = threading.Condition()
+
+    # ----- Gate -----
+    def acquire(self):
+        with self.cond:
+            while True:
+                now = time.monotonic()
+
+                if self.circuit_state == "open":
+                    if now - self.circuit_opened_at < self.cooldown_seconds:
+                        raise CircuitOpenError(
+                            f"circuit open, retry in {self.cooldown_seconds - (now - self.circuit_opened_at):.0f}s"
+                        )
+                    self.circuit_state = "half_open"
+
+                if now < self.paused_until:
+                    # Honour Retry-After for everyone, not just the request that got it
+                    self.cond.wait(self.paused_until - now)
+                    continue
+
+                # Half-open: exactly one probe in flight
+                allowed = 1 if self.circuit_state == "half_open" else int(self.limit)
+                if self.in_flight < allowed:
+                    self.in_flight += 1
+                    return
+
+                self.cond.wait(1.0)
+
+    def cooldown_remaining(self):
+        """Seconds until an open circuit lets a probe through (0 if it is not open)."""
+        with self.cond:
+            if self.circuit_state != "open":
+                return 0.0
+            return max(0.0, self.cooldown_seconds - (time.monotonic() - self.circuit_opened_at))
+
+    def release(self, latency, status=None, error=None, retry_after=None):
+        with self.cond:
+            self.in_flight -= 1
+            self.requests += 1
+            now = time.monotonic()
+            self.completed_at.append(now)
+
+            if latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+            throttled = status in THROTTLE_STATUSES
+            failed = error is not None or throttled or (status is not None and status >= 500)
+
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + min(retry_after, self.max_retry_after))
+
+            if failed:
+                self.errors += 1
+                self.throttled += 1 if throttled else 0
+                self.consecutive_failures += 1
+                self._decrease()
+                if self.circuit_state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                    self.circuit_state = "open"
+                    self.circuit_opened_at = now
+            else:
+                self.consecutive_failures = 0
+                self.circuit_state = "closed"
+                if latency is not None and latency > 2 * self.target_latency:
+                    self._decrease()
+                elif latency is None or latency <= self.target_latency:
+                    # Additive increase: +1 once a full window (current limit) of healthy responses is seen
+                    self.healthy_streak += 1
+                    if self.healthy_streak >= int(self.limit):
+                        self.limit = min(self.max_concurrency, self.limit + 1)
+                        self.healthy_streak = 0
+
+            self.cond.notify_all()
+
+    def _decrease(self):
+        self.limit = max(self.min_concurrency, self.limit * self.decrease_factor)
+        self.healthy_streak = 0
+
+    # ----- Convenience -----
+    def fetch(self, url, headers=None, timeout=10, retries=1):
+        """
+        requests.get through the throttle. A 429/503 is retried up to `retries` times once the pause
+        it triggered has passed (acquire() waits out Retry-After). Raises CircuitOpenError when the circuit is open.
+        """
+        for attempt in range(retries + 1):
+            self.acquire()
+            started = time.monotonic()
+            try:
+                res = requests.get(url, headers=headers, timeout=timeout)
+            except Exception as e:
+                self.release(time.monotonic() - started, error=e)
+                raise
+
+            retry_after = parse_retry_after(res.headers.get("Retry-After")) if res.status_code in THROTTLE_STATUSES else None
+            self.release(time.monotonic() - started, status=res.status_code, retry_after=retry_after)
+            if res.status_code not in THROTTLE_STATUSES or attempt == retries:
+                return res
+            if not retry_after:
+                time.sleep(DEFAULT_RETRY_DELAY)
+        return res
+
+    def metrics(self, window_seconds=60):
+        with self.cond:
+            now = time.monotonic()
+            while self.completed_at and now - self.completed_at[0] > window_seconds:
+                self.completed_at.popleft()
+            return {
+                "concurrency": int(self.limit),
+                "in_flight": self.in_flight,
+                "rate_per_sec": round(len(self.completed_at) / window_seconds, 2),
+                "requests": self.requests,
+                "errors": self.errors,
+                "throttled": self.throttled,
+                "avg_latency": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                "circuit": self.circuit_state,
+                "paused_for": round(max(0.0, self.paused_until - now), 1),
+            }
+
+    def format_metrics(self):
+        m = self.metrics()
+        return (f"concurrency={m['concurrency']} rate={m['rate_per_sec']}/s requests={m['requests']} "
+                f"errors={m['errors']} throttled={m['throttled']} latency={m['avg_latency']}s circuit={m['circuit']}")
@@ -0,0 +1,365 @@
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+
+import requests
+
+from src.article_parser import parse_article_page, parse_listing_page
+from src.database_manager import DB_NAME, init_db, is_article_exists
+from src.fox_scraper import BASE_URL, HEADERS, process_article, enable_incremental_indexes, fetch_article_html, fetch_throttle
+from src.throttle import CircuitOpenError
+
+# Work-queue crawling: one coordinator enqueues discovered URLs, N workers (processes, possibly
+# on other machines) claim, fetch, analyze and save them.
+#
+# Each URL is one job (url is the primary key; enqueueing again only revives failed jobs). A worker holds a
+# time-limited lease and renews it with heartbeats while it works; if the worker dies the lease
+# expires and another worker picks the job up. A worker re-checks its lease right before the AI
+# call and again before saving, completion is fenced on the lease owner, and the article insert
+# itself is idempotent (INSERT OR IGNORE), so each URL ends up analyzed and saved once.
+
+LEASE_SECONDS = 120
+HEARTBEAT_SECONDS = 30
+MAX_ATTEMPTS = 3
+RETRY_BACKOFF_SECONDS = 30      # a failed job waits 30s, 60s, ... before it can be claimed again
+IDLE_POLL_SECONDS = 5
+LISTING_URL = f"{BASE_URL}/tech"
+
+
+class JobQueue(ABC):
+    """Backend interface. Implementations must make claim() atomic across processes."""
+
+    @abstractmethod
+    def enqueue(self, jobs):
+        """jobs: iterable of {"url", "title"}. Re-queues failed jobs. Returns how many were new or re-queued."""
+
+    @abstractmethod
+    def claim(self, worker_id):
+        """Lease the next available job to worker_id. Returns {"url", "title", "attempts"} or None."""
+
+    @abstractmethod
+    def heartbeat(self, url, worker_id):
+        """Extend the lease. Returns False if the worker no longer owns it."""
+
+    @abstractmethod
+    def complete(self, url, worker_id, result):
+        """Mark the job done. Returns False if the worker no longer owns it."""
+
+    @abstractmethod
+    def fail(self, url, worker_id, error):
+        """Release the job for a retry after a backoff, or mark it failed after MAX_ATTEMPTS."""
+
+    @abstractmethod
+    def release(self, url, worker_id, delay=0):
+        """Give the job back without counting the attempt (e.g. the site is unavailable); claimable after `delay` seconds."""
+
+    @abstractmethod
+    def stats(self):
+        """Job counts per status, plus expired_leases."""
+
+
+class SQLiteJobQueue(JobQueue):
+    """
+    Job queue in the crawl_jobs table of the article database.
+    Fine for several processes on one machine (or a shared disk with working file locks);
+    plug in another backend via QUEUE_BACKENDS for real multi-host setups.
+    """
+
+    def __init__(self, db_name=DB_NAME, lease_seconds=LEASE_SECONDS):
+        self.db_name = db_name
+        self.lease_seconds = lease_seconds
+
+    def _connect(self):
+        # Autocommit mode so we can issue BEGIN IMMEDIATE ourselves
+        return sqlite3.connect(self.db_name, timeout=30, isolation_level=None)
+
+    def enqueue(self, jobs):
+        now = time.strftime("%Y-%m-%d %H:%M:%S")
+        conn = self._connect()
+        c = conn.cursor()
+        added = 0
+        try:
+            c.execute("BEGIN IMMEDIATE")
+            for job in jobs:
+                # New URLs are added; a job that had failed for good gets a fresh set of attempts
+                # when the coordinator rediscovers it. Pending/leased/done jobs are left alone.
+                c.execute(
+                    """
+                    INSERT INTO crawl_jobs (url, title, status, attempts, enqueued_at) VALUES (?, ?, 'pending', 0, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        status = 'pending', attempts = 0, result = NULL, not_before = NULL, finished_at = NULL,
+                        enqueued_at = excluded.enqueued_at
+                    WHERE crawl_jobs.status = 'failed'
+                    """, (job["url"], job.get("title"), now)
+                )
+                added += c.rowcount
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        return added
+
+    def claim(self, worker_id):
+        now = time.time()
+        conn = self._connect()
+        c = conn.cursor()
+        try:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers can't pick the same row
+            c.execute("BEGIN IMMEDIATE")
+            # A worker that died on its last attempt leaves an expired lease nobody may claim again
+            c.execute(
+                """
+                UPDATE crawl_jobs
+                SET status = 'failed', result = 'lease expired on final attempt', finished_at = ?,
+                    lease_owner = NULL, lease_expires_at = NULL
+                WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?
+                """, (time.strftime("%Y-%m-%d %H:%M:%S"), now, MAX_ATTEMPTS))
+            c.execute(
+                """
+                SELECT url, title, attempts FROM crawl_jobs
+                WHERE (status = 'pending' AND (not_before IS NULL OR not_before <= ?))
+                   OR (status = 'leased' AND lease_expires_at < ? AND attempts < ?)
+                ORDER BY enqueued_at
+                LIMIT 1
+                """, (now, now, MAX_ATTEMPTS))
+            row = c.fetchone()
+            if row is None:
+                c.execute("COMMIT")
+                return None
+
+            url, title, attempts = row
+            c.execute(
+                """
+                UPDATE crawl_jobs
+                SET status = 'leased', lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?, attempts = attempts + 1
+                WHERE url = ?
+                """, (worker_id, now + self.lease_seconds, now, url))
+            c.execute("COMMIT")
+            return {"url": url, "title": title, "attempts": attempts + 1}
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def _update_owned(self, sql, params):
+        # Only the current lease owner may touch a leased job
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute(sql, params)
+        changed = c.rowcount > 0
+        conn.close()
+        return changed
+
+    def heartbeat(self, url, worker_id):
+        now = time.time()
+        return self._update_owned(
+            "UPDATE crawl_jobs SET lease_expires_at = ?, heartbeat_at = ? "
+            "WHERE url = ? AND lease_owner = ? AND status = 'leased'",
+            (now + self.lease_seconds, now, url, worker_id)
+        )
+
+    def complete(self, url, worker_id, result):
+        return self._update_owned(
+            "UPDATE crawl_jobs SET status = 'done', result = ?, finished_at = ?, lease_expires_at = NULL "
+            "WHERE url = ? AND lease_owner = ? AND status = 'leased'",
+            (result, time.strftime("%Y-%m-%d %H:%M:%S"), url, worker_id)
+        )
+
+    def fail(self, url, worker_id, error):
+        # Exponential backoff: RETRY_BACKOFF_SECONDS * 2^(attempts - 1)
+        return self._update_owned(
+            "UPDATE crawl_jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "result = ?, lease_owner = NULL, lease_expires_at = NULL, "
+            "not_before = ? + ? * (1 << (attempts - 1)) "
+            "WHERE url = ? AND lease_owner = ? AND status = 'leased'",
+            (MAX_ATTEMPTS, str(error)[:500], time.time(), RETRY_BACKOFF_SECONDS, url, worker_id)
+        )
+
+    def release(self, url, worker_id, delay=0):
+        return self._update_owned(
+            "UPDATE crawl_jobs SET status = 'pending', attempts = MAX(attempts - 1, 0), "
+            "lease_owner = NULL, lease_expires_at = NULL, not_before = ? "
+            "WHERE url = ? AND lease_owner = ? AND status = 'leased'",
+            (time.time() + delay, url, worker_id)
+        )
+
+    def stats(self):
+        conn = self._connect()
+        c = conn.cursor()
+        c.execute("SELECT status, COUNT(*) FROM crawl_jobs GROUP BY status")
+        counts = dict(c.fetchall())
+        c.execute("SELECT COUNT(*) FROM crawl_jobs WHERE status = 'leased' AND lease_expires_at < ?", (time.time(),))
+        counts["expired_leases"] = c.fetchone()[0]
+        conn.close()
+        return counts
+
+
+# Pluggable backends: name -> factory(**kwargs)
+QUEUE_BACKENDS = {
+    "sqlite": SQLiteJobQueue,
+}
+
+
+def get_queue(backend=None, **kwargs):
+    backend = backend or os.getenv("FOX_QUEUE_BACKEND", "sqlite")
+    if backend not in QUEUE_BACKENDS:
+        raise ValueError(f"Unknown queue backend '{backend}'. Available: {', '.join(QUEUE_BACKENDS)}")
+    return QUEUE_BACKENDS[backend](**kwargs)
+
+
+# ----- Coordinator -----
+def run_coordinator(queue, interval=None):
+    """Discover today's articles on the listing page and enqueue them. Repeats every `interval` seconds if set."""
+    while True:
+        try:
+            res = requests.get(LISTING_URL, headers=HEADERS, timeout=10)
+            res.raise_for_status()
+            jobs = [item for item in parse_listing_page(res.text, BASE_URL) if not is_article_exists(item["url"])]
+            added = queue.enqueue(jobs)
+            print(f"📥 [Coordinator] {len(jobs)} candidates, {added} new jobs | queue: {queue.stats()}")
+        except Exception as e:
+            print(f"❌ [Coordinator] Discovery failed: {e}")
+
+        if not interval:
+            return
+        time.sleep(interval)
+
+
+# ----- Worker -----
+class _Heartbeat(threading.Thread):
+    # Renews the lease in the background while the worker fetches and waits on Gemini
+    def __init__(self, queue, url, worker_id):
+        super().__init__(daemon=True)
+        self.queue, self.url, self.worker_id = queue, url, worker_id
+        self.stop_event = threading.Event()
+        self.lost = False
+
+    def run(self):
+        while not self.stop_event.wait(HEARTBEAT_SECONDS):
+            if not self.queue.heartbeat(self.url, self.worker_id):
+                self.lost = True
+                return
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+class LeaseLostError(Exception):
+    pass
+
+
+def process_job(job, queue, worker_id, heartbeat):
+    """Fetch, parse, analyze and save one URL. Returns a result label."""
+    url = job["url"]
+    if is_article_exists(url):
+        return "duplicate"    # Saved by an earlier attempt whose lease then expired
+
+    def still_owned():
+        # Renewing the lease doubles as the ownership check
+        return not heartbeat.lost and queue.heartbeat(url, worker_id)
+
+    parsed = parse_article_page(fetch_article_html(url))
+    if not parsed["content"]:
+        return "no_body"
+
+    # Another worker may have re-claimed the job while we fetched: don't pay for a second Gemini call
+    if not still_owned():
+        raise LeaseLostError(url)
+
+    if process_article(job["title"] or parsed["title"] or url, url, parsed["published_date"], parsed["content"],
+                       can_save=still_owned):
+        return "saved"
+    if not still_owned():
+        raise LeaseLostError(url)
+    if is_article_exists(url):
+        return "duplicate"
+    raise RuntimeError("AI analysis failed")
+
+
+def run_worker(queue, worker_id=None, exit_when_idle=False):
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    enable_incremental_indexes()
+    print(f"👷 [Worker {worker_id}] started")
+
+    processed = 0
+    while True:
+        job = queue.claim(worker_id)
+        if job is None:
+            # Jobs waiting out a retry backoff are still work to do
+            counts = queue.stats()
+            if exit_when_idle and not counts.get("pending") and not counts.get("leased"):
+                break
+            time.sleep(IDLE_POLL_SECONDS)
+            continue
+
+        print(f"🔧 [Worker {worker_id}] attempt {job['attempts']}: {job['url']}")
+        heartbeat = _Heartbeat(queue, job["url"], worker_id)
+        heartbeat.start()
+        try:
+            result = process_job(job, queue, worker_id, heartbeat)
+            heartbeat.stop()
+            if queue.complete(job["url"], worker_id, result):
+                processed += 1
+                print(f"✅ [Worker {worker_id}] {result}: {job['url']}")
+            else:
+                print(f"⚠️ [Worker {worker_id}] lease lost before completion: {job['url']}")
+        except LeaseLostError:
+            # The job belongs to another worker now; leave it alone
+            heartbeat.stop()
+            print(f"⚠️ [Worker {worker_id}] lease lost, dropping: {job['url']}")
+        except CircuitOpenError:
+            # The site is failing, not this job: hand it back without using up an attempt and wait out the cooldown
+            heartbeat.stop()
+            wait_seconds = fetch_throttle.cooldown_remaining()
+            queue.release(job["url"], worker_id, wait_seconds)
+            print(f"⏸️ [Worker {worker_id}] circuit open, pausing {wait_seconds:.0f}s: {job['url']}")
+            time.sleep(wait_seconds)
+        except Exception as e:
+            heartbeat.stop()
+            print(f"❌ [Worker {worker_id}] {job['url']} | {e}")
+            queue.fail(job["url"], worker_id, e)
+
+        # No fixed pause between jobs: fetch_throttle paces requests (Retry-After pauses, circuit breaker)
+        # and ai_service keeps Gemini calls under GEMINI_RPM
+
+    print(f"👋 [Worker {worker_id}] idle, exiting after {processed} jobs")
+    print(f"📈 Fetch metrics: {fetch_throttle.format_metrics()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Work-queue based crawling")
+    parser.add_argument("role", choices=["coordinator", "worker", "stats"])
+    parser.add_argument("--backend", default=None, help="queue backend (default: $FOX_QUEUE_BACKEND or sqlite)")
+    parser.add_argument("--interval", type=int, default=None, help="coordinator: re-discover every N seconds")
+    parser.add_argument("--workers", type=int, default=1, help="worker: number of worker processes to start")
+    parser.add_argument("--exit-when-idle", action="store_true", help="worker: stop when the queue is empty")
+    args = parser.parse_args()
+
+    init_db()
+    queue = get_queue(args.backend)
+
+    if args.role == "coordinator":
+        run_coordinator(queue, args.interval)
+    elif args.role == "stats":
+        print(queue.stats())
+    elif args.workers == 1:
+        run_worker(queue, exit_when_idle=args.exit_when_idle)
+    else:
+        from multiprocessing import Process
+        procs = [
+            Process(target=run_worker, args=(get_queue(args.backend),), kwargs={"exit_when_idle": args.exit_when_idle})
+            for _ in range(args.workers)
+        ]
+        for p in procs:
+            p.start()
+        for p in procs:
+            p.join()